@@ -1,9 +1,25 @@
 # Course:      CS261 - Data Structures
 # Assignment:  6
-# Description: Provided data structures necessary to complete the assignment.
-#              Please look through this file carefully to see what methods
-#              are available and how they're implemented.
-#              Don't modify the contents of this file.
+# Description: Provided data structures necessary to complete the assignment,
+#              extended with the helpers the hash map modules share: stronger and
+#              batch hash functions, prime and power of two capacity helpers,
+#              bucket_indices(), DistributionReport, Instrumentation and
+#              HashMapView. The provided DynamicArray, LinkedList, SLNode and
+#              HashEntry keep every method they came with, so the assignment's
+#              own code runs against this file unchanged.
+
+
+import bisect
+import heapq
+import math
+import multiprocessing
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
@@ -16,7 +32,7 @@ class DynamicArray:
     """
     Class implementing a Dynamic Array
     Supported methods are:
-    append, pop, swap, get_at_index, set_at_index, length
+    append, pop, swap, get_at_index, set_at_index, length, iterator
     """
 
     def __init__(self, arr=None) -> None:
@@ -25,17 +41,24 @@ class DynamicArray:
 
     def __iter__(self):
         """
-        Disable iterator capability for DynamicArray class
-        This means loops and aggregate functions like
-        those shown below won't work:
-
-        da = DynamicArray()
-        for value in da:        # will not work
-        min(da)                 # will not work
-        max(da)                 # will not work
-        sort(da)                # will not work
+        Iterate over the elements in order, so loops and aggregate
+        functions work:
+
+        da = DynamicArray([3, 1, 2])
+        for value in da: ...
+        min(da), max(da), sorted(da)
+
+        Raises DynamicArrayException if the array grows or shrinks
+        while it is being iterated.
         """
-        return None
+        data = self._data
+        length = len(data)
+        for index in range(length):
+            if len(data) != length:
+                raise DynamicArrayException("DynamicArray changed size during iteration")
+            yield data[index]
+        if len(data) != length:
+            raise DynamicArrayException("DynamicArray changed size during iteration")
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -96,6 +119,601 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+# ------------- Stronger hash functions ------------- #
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# SipHash key used by siphash_24() when none is given. It is drawn fresh for every
+# process, so an attacker who cannot see it cannot precompute colliding keys.
+_SIPHASH_KEY = os.urandom(16)
+
+
+def fnv1a_hash(key: str) -> int:
+    """64 bit FNV-1a over the UTF-8 bytes of key."""
+    hash = 0xCBF29CE484222325
+    for byte in key.encode('utf-8'):
+        hash = ((hash ^ byte) * 0x100000001B3) & _MASK64
+    return hash
+
+
+def murmur_hash(key: str, seed: int = 0) -> int:
+    """64 bit MurmurHash64A over the UTF-8 bytes of key."""
+    m = 0xC6A4A7935BD1E995
+    data = key.encode('utf-8')
+    length = len(data)
+    hash = (seed ^ (length * m)) & _MASK64
+
+    end = length - length % 8
+    for index in range(0, end, 8):
+        k = (int.from_bytes(data[index:index + 8], 'little') * m) & _MASK64
+        k = ((k ^ (k >> 47)) * m) & _MASK64
+        hash = ((hash ^ k) * m) & _MASK64
+
+    if end != length:
+        hash = ((hash ^ int.from_bytes(data[end:], 'little')) * m) & _MASK64
+
+    hash = ((hash ^ (hash >> 47)) * m) & _MASK64
+    return hash ^ (hash >> 47)
+
+
+def siphash_24(key: str, secret: bytes = None) -> int:
+    """
+    SipHash-2-4 of the UTF-8 bytes of key under a 16 byte secret. Without a secret
+    the per-process random key is used, which keeps the hash flooding resistant
+    but means hashes differ between runs.
+    """
+    secret = _SIPHASH_KEY if secret is None else secret
+    k0 = int.from_bytes(secret[:8], 'little')
+    k1 = int.from_bytes(secret[8:16], 'little')
+    v0 = k0 ^ 0x736F6D6570736575
+    v1 = k1 ^ 0x646F72616E646F6D
+    v2 = k0 ^ 0x6C7967656E657261
+    v3 = k1 ^ 0x7465646279746573
+
+    def sip_rounds(count, v0, v1, v2, v3):
+        for _ in range(count):
+            v0 = (v0 + v1) & _MASK64
+            v1 = ((v1 << 13) | (v1 >> 51)) & _MASK64 ^ v0
+            v0 = ((v0 << 32) | (v0 >> 32)) & _MASK64
+            v2 = (v2 + v3) & _MASK64
+            v3 = ((v3 << 16) | (v3 >> 48)) & _MASK64 ^ v2
+            v0 = (v0 + v3) & _MASK64
+            v3 = ((v3 << 21) | (v3 >> 43)) & _MASK64 ^ v0
+            v2 = (v2 + v1) & _MASK64
+            v1 = ((v1 << 17) | (v1 >> 47)) & _MASK64 ^ v2
+            v2 = ((v2 << 32) | (v2 >> 32)) & _MASK64
+        return v0, v1, v2, v3
+
+    data = key.encode('utf-8')
+    length = len(data)
+    end = length - length % 8
+    for index in range(0, end, 8):
+        m = int.from_bytes(data[index:index + 8], 'little')
+        v3 ^= m
+        v0, v1, v2, v3 = sip_rounds(2, v0, v1, v2, v3)
+        v0 ^= m
+
+    m = ((length & 0xFF) << 56) | int.from_bytes(data[end:], 'little')
+    v3 ^= m
+    v0, v1, v2, v3 = sip_rounds(2, v0, v1, v2, v3)
+    v0 ^= m
+
+    v2 ^= 0xFF
+    v0, v1, v2, v3 = sip_rounds(4, v0, v1, v2, v3)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def seeded_hash_function(name: str, seed) -> callable:
+    """
+    Return a copy of a seedable hash function fixed to seed. 'murmur' takes an
+    integer seed and 'siphash' a 16 byte secret.
+    """
+    if name == 'murmur':
+        function = lambda key: murmur_hash(key, seed)
+    elif name == 'siphash':
+        if len(seed) != 16:
+            raise ValueError("siphash needs a 16 byte secret")
+        function = lambda key: siphash_24(key, seed)
+    else:
+        raise ValueError(f"{name} does not take a seed, use one of murmur, siphash")
+    function.__name__ = f"{name}_seeded"
+    return function
+
+
+# name -> hash function, for picking one by name in the HashMap constructors
+HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a': fnv1a_hash,
+    'murmur': murmur_hash,
+    'siphash': siphash_24,
+}
+
+
+def get_hash_function(function) -> callable:
+    """
+    Return function itself if it is callable, otherwise look it up by name in
+    HASH_FUNCTIONS.
+    """
+    if callable(function):
+        return function
+    if function not in HASH_FUNCTIONS:
+        raise ValueError(f"function must be callable or one of {', '.join(HASH_FUNCTIONS)}")
+    return HASH_FUNCTIONS[function]
+
+
+# ------------- Prime capacities ------------- #
+
+# next_prime(2 * p) for each p, starting from the default capacity of 11: the
+# capacities a map walks through when put() keeps doubling it.
+GROWTH_PRIMES = (
+    11, 23, 47, 97, 197, 397, 797, 1597, 3203, 6421, 12853, 25717, 51437, 102877, 205759,
+    411527, 823117, 1646237, 3292489, 6584983, 13169977, 26339969, 52679969, 105359939,
+    210719881, 421439783, 842879579, 1685759167, 3371518343, 6743036717, 13486073473,
+    26972146961, 53944293929, 107888587883, 215777175787, 431554351609, 863108703229,
+    1726217406467, 3452434812973, 6904869625999, 13809739252051, 27619478504183,
+    55238957008387, 110477914016779, 220955828033581, 441911656067171, 883823312134381,
+    1767646624268779, 3535293248537579, 7070586497075177, 14141172994150357,
+    28282345988300791, 56564691976601587, 113129383953203213, 226258767906406483,
+    452517535812813007, 905035071625626043, 1810070143251252131, 3620140286502504283,
+    7240280573005008577,
+)
+
+# Miller-Rabin with these bases is exact for every n below 3.3 * 10**24
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_prime(capacity: int) -> bool:
+    """
+    Determine if given integer is a prime number with a deterministic
+    Miller-Rabin test and return boolean
+    """
+    if capacity < 2:
+        return False
+
+    for base in _MILLER_RABIN_BASES:
+        if capacity % base == 0:
+            return capacity == base
+
+    odd, shifts = capacity - 1, 0
+    while odd % 2 == 0:
+        odd //= 2
+        shifts += 1
+
+    for base in _MILLER_RABIN_BASES:
+        x = pow(base, odd, capacity)
+        if x == 1 or x == capacity - 1:
+            continue
+        for _ in range(shifts - 1):
+            x = x * x % capacity
+            if x == capacity - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def next_prime(capacity: int) -> int:
+    """
+    Return the closest prime at or above capacity, bumping even numbers up
+    by one first. A request between 2 * p and the GROWTH_PRIMES entry after p
+    is answered from the table, since no prime lies between those two.
+    """
+    if capacity % 2 == 0:
+        capacity += 1
+
+    index = bisect.bisect_left(GROWTH_PRIMES, capacity)
+    if 0 < index < len(GROWTH_PRIMES) and capacity > 2 * GROWTH_PRIMES[index - 1]:
+        return GROWTH_PRIMES[index]
+
+    while not is_prime(capacity):
+        capacity += 2
+
+    return capacity
+
+
+# ------------- Power of two tables ------------- #
+
+def mix_hash(hash: int) -> int:
+    """
+    Avalanche the low 64 bits of a hash (MurmurHash3 fmix64 finalizer) so every
+    input bit affects the low bits a power of two mask keeps. The mapping is a
+    bijection on 64 bit values.
+    """
+    hash &= 0xFFFFFFFFFFFFFFFF
+    hash ^= hash >> 33
+    hash = (hash * 0xFF51AFD7ED558CCD) & 0xFFFFFFFFFFFFFFFF
+    hash ^= hash >> 33
+    hash = (hash * 0xC4CEB9FE1A85EC53) & 0xFFFFFFFFFFFFFFFF
+    hash ^= hash >> 33
+    return hash
+
+
+def next_power_of_two(capacity: int) -> int:
+    """Return the smallest power of two that is at least capacity (and at least 1)."""
+    return 1 << max(capacity - 1, 0).bit_length()
+
+
+# ------------- Batch hashing (NumPy when available) ------------- #
+
+def _code_points(keys) -> tuple:
+    """
+    Encode a batch of keys into one flat array of code points.
+    Returns (code_points, starts, ends) where key i occupies
+    code_points[starts[i]:ends[i]]. UTF-32 is used so every element
+    equals ord() of the matching character.
+    """
+    blob = ''.join(keys).encode('utf-32-le', 'surrogatepass')
+    code_points = np.frombuffer(blob, dtype='<u4').astype(np.int64)
+    lengths = np.fromiter((len(key) for key in keys), dtype=np.int64, count=len(keys))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    return code_points, starts, ends
+
+
+def _segment_sums(values, starts, ends):
+    """Sum values over each [start, end) segment; empty segments sum to 0."""
+    totals = np.zeros(values.size + 1, dtype=np.int64)
+    np.cumsum(values, out=totals[1:])
+    return totals[ends] - totals[starts]
+
+
+def hash_function_1_batch(keys) -> DynamicArray:
+    """
+    Batch version of hash_function_1. Takes a sequence of keys and
+    returns a DynamicArray of the same integers hash_function_1 gives.
+    """
+    keys = list(keys)
+    if np is None or not keys:
+        return DynamicArray([sum(map(ord, key)) for key in keys])
+
+    code_points, starts, ends = _code_points(keys)
+    return DynamicArray(_segment_sums(code_points, starts, ends).tolist())
+
+
+def hash_function_2_batch(keys) -> DynamicArray:
+    """
+    Batch version of hash_function_2. Takes a sequence of keys and
+    returns a DynamicArray of the same integers hash_function_2 gives.
+    """
+    keys = list(keys)
+    if np is None or not keys:
+        return DynamicArray([sum(position * ord(letter) for position, letter in enumerate(key, 1))
+                             for key in keys])
+
+    code_points, starts, ends = _code_points(keys)
+    # 1-based position of each character inside its own key
+    positions = np.arange(1, code_points.size + 1, dtype=np.int64) - np.repeat(starts, ends - starts)
+    return DynamicArray(_segment_sums(code_points * positions, starts, ends).tolist())
+
+
+_BATCH_HASH_FUNCTIONS = {
+    hash_function_1: hash_function_1_batch,
+    hash_function_2: hash_function_2_batch,
+}
+
+
+def hash_batch(function: callable, keys) -> DynamicArray:
+    """
+    Hash a whole batch of keys with the given scalar hash function.
+    Uses the matching batch function when one exists, otherwise calls
+    the scalar function once per key. Returns a DynamicArray of hashes.
+    """
+    batch_function = _BATCH_HASH_FUNCTIONS.get(function)
+    if batch_function is not None:
+        return batch_function(keys)
+    return DynamicArray([function(key) for key in keys])
+
+
+# below this many hashes, pickling them to a pool costs more than the modulo it spreads out
+PARALLEL_BUCKET_MIN = 1 << 18
+
+
+def _bucket_range(hashes: list, length: int, power_of_two: bool) -> list:
+    """Return the bucket of each hash in one range; runs in a pool worker."""
+    if power_of_two:
+        mask = length - 1
+        return [hash & mask for hash in hashes]
+    return [hash % length for hash in hashes]
+
+
+def bucket_indices(hashes, length: int, power_of_two: bool = False, workers: int = 1,
+                   pool=None) -> DynamicArray:
+    """
+    Return a DynamicArray with the bucket each hash maps to in a table of the
+    given length: hash % length, or hash & (length - 1) with power_of_two.
+    Uses NumPy when it is available and every hash fits in 64 bits. Otherwise,
+    with more than one worker (None means one per CPU) and at least
+    PARALLEL_BUCKET_MIN hashes, the hashes are split into one range per worker
+    and the ranges are computed on pool, a multiprocessing.Pool, or on a
+    temporary pool when none is given. Each range is pickled both ways for
+    one modulo per hash, so this only pays off on several idle CPUs.
+    """
+    hashes = list(hashes)
+    if np is not None and hashes and min(hashes) >= 0 and max(hashes) <= _MASK64:
+        array = np.array(hashes, dtype=np.uint64)
+        if power_of_two:
+            return DynamicArray((array & np.uint64(length - 1)).tolist())
+        return DynamicArray((array % np.uint64(length)).tolist())
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(hashes) < max(PARALLEL_BUCKET_MIN, 2 * workers):
+        return DynamicArray(_bucket_range(hashes, length, power_of_two))
+
+    step = -(-len(hashes) // workers)
+    ranges = [(hashes[start:start + step], length, power_of_two) for start in range(0, len(hashes), step)]
+    if pool is None:
+        with multiprocessing.Pool(workers) as pool:
+            parts = pool.starmap(_bucket_range, ranges)
+    else:
+        parts = pool.starmap(_bucket_range, ranges)
+
+    indices = []
+    for part in parts:
+        indices.extend(part)
+    return DynamicArray(indices)
+
+
+# ------------- Distribution analysis ------------- #
+
+class DistributionReport:
+    """
+    Summary of how the entries of a hash table are spread, returned by the
+    HashMaps' analyze() methods.
+    histogram[n] is the number of samples of length n: chain lengths per bucket
+    for separate chaining, probe lengths per live entry for open addressing.
+    chi_squared compares the number of keys whose hash lands on each bucket with
+    a uniform spread; uniformity divides it by its degrees of freedom, so a good
+    hash scores about 1 and clustering pushes it up.
+    top_buckets holds (bucket index, keys hashed there) for the fullest buckets.
+    """
+
+    def __init__(self, histogram: list, bucket_counts: list, top: int) -> None:
+        """Build the report from a length histogram and per bucket key counts."""
+        self.histogram = DynamicArray(histogram)
+        self.samples = sum(histogram)
+        self.max = len(histogram) - 1 if self.samples else 0
+        total = sum(length * count for length, count in enumerate(histogram))
+        self.mean = total / self.samples if self.samples else 0.0
+
+        buckets = len(bucket_counts)
+        keys = sum(bucket_counts)
+        expected = keys / buckets
+        self.chi_squared = sum((count - expected) ** 2 for count in bucket_counts) / expected if keys else 0.0
+        self.uniformity = self.chi_squared / (buckets - 1) if buckets > 1 else 0.0
+
+        fullest = heapq.nlargest(top, range(buckets), key=bucket_counts.__getitem__)
+        self.top_buckets = DynamicArray([(index, bucket_counts[index]) for index in fullest
+                                         if bucket_counts[index] > 0])
+
+    def __str__(self) -> str:
+        """Override string method to provide a one line summary."""
+        return (f"samples: {self.samples} mean: {self.mean:.2f} p50: {self.percentile(50)} "
+                f"p90: {self.percentile(90)} p99: {self.percentile(99)} max: {self.max} "
+                f"uniformity: {self.uniformity:.2f} top: {self.top_buckets}")
+
+    def percentile(self, percent: float) -> int:
+        """Return the smallest length that at least percent of the samples do not exceed."""
+        target = self.samples * percent / 100
+        seen = 0
+        for length in range(self.histogram.length()):
+            seen += self.histogram[length]
+            if seen >= target and seen > 0:
+                return length
+        return 0
+
+
+# ------------- Instrumentation ------------- #
+
+# public methods whose calls are counted, with the counter each one adds to
+_COUNTED_OPERATIONS = (
+    ('put', 'put', False),
+    ('get', 'get', False),
+    ('remove', 'remove', False),
+    ('upsert', 'put', False),
+    ('put_if_absent', 'put', False),
+    ('put_many', 'put', True),
+    ('get_many', 'get', True),
+    ('remove_many', 'remove', True),
+)
+
+
+class Instrumentation:
+    """
+    Cumulative operation counters for one HashMap, returned by the HashMaps'
+    enable_instrumentation(). Nothing is counted while instrumentation is off:
+    enabling it replaces the map's methods with counting wrappers on that one
+    instance and disabling it removes them again.
+    probes counts buckets examined (open addressing) or chain nodes walked
+    (separate chaining), and collisions the operations that had to look past
+    another key. Latency callbacks are called as callback(operation, seconds)
+    after every put/get/remove (and batch) call.
+    """
+
+    COUNTERS = ('put', 'get', 'remove', 'probes', 'collisions', 'resizes', 'resize_time')
+
+    def __init__(self) -> None:
+        """Initialize zeroed counters with no callbacks."""
+        self.counters = {}
+        self.callbacks = []
+        self._replaced = []
+        self.reset()
+
+    def snapshot(self) -> dict:
+        """Return a copy of the counters."""
+        return dict(self.counters)
+
+    def reset(self) -> None:
+        """Zero every counter."""
+        for name in self.COUNTERS:
+            self.counters[name] = 0
+        self.counters['resize_time'] = 0.0
+
+    def add_latency_callback(self, callback: callable) -> None:
+        """Call callback(operation, seconds) after every counted operation."""
+        self.callbacks.append(callback)
+
+    def remove_latency_callback(self, callback: callable) -> None:
+        """Stop calling a callback added with add_latency_callback()."""
+        self.callbacks.remove(callback)
+
+    def install(self, hash_map, name: str, wrapper: callable) -> None:
+        """Replace attribute name on hash_map with wrapper until uninstall()."""
+        self._replaced.append((name, hash_map.__dict__.get(name)))
+        setattr(hash_map, name, wrapper)
+
+    def replaced(self) -> list:
+        """Return (name, original attribute or None) for each install(), in order."""
+        return list(self._replaced)
+
+    def uninstall(self, hash_map) -> None:
+        """Put back every attribute install() replaced on hash_map."""
+        while self._replaced:
+            name, original = self._replaced.pop()
+            if original is None:
+                delattr(hash_map, name)
+            else:
+                setattr(hash_map, name, original)
+
+    def install_operations(self, hash_map) -> None:
+        """Install the call counting, latency and resize wrappers shared by both maps."""
+        for name, counter, batch in _COUNTED_OPERATIONS:
+            self.install(hash_map, name, self._count_calls(getattr(hash_map, name), counter, batch))
+        self.install(hash_map, 'resize_table', self.time_resizes(hash_map.resize_table))
+
+    def _count_calls(self, method: callable, counter: str, batch: bool) -> callable:
+        """Return a wrapper around method that counts its keys and reports its latency."""
+        counters, callbacks, clock = self.counters, self.callbacks, time.perf_counter
+        operation = method.__name__
+
+        def counted(*args, **kwargs):
+            if batch:
+                # the batch methods take keys first; a one shot iterable is listed and passed on
+                if args:
+                    args = (list(args[0]),) + args[1:]
+                    counters[counter] += len(args[0])
+                else:
+                    kwargs['keys'] = list(kwargs['keys'])
+                    counters[counter] += len(kwargs['keys'])
+            else:
+                counters[counter] += 1
+            if not callbacks:
+                return method(*args, **kwargs)
+            start = clock()
+            result = method(*args, **kwargs)
+            elapsed = clock() - start
+            for callback in callbacks:
+                callback(operation, elapsed)
+            return result
+
+        return counted
+
+    def time_resizes(self, method: callable) -> callable:
+        """Return a wrapper around a resize method that counts and times its calls."""
+        counters, clock = self.counters, time.perf_counter
+
+        def timed(*args, **kwargs):
+            counters['resizes'] += 1
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                counters['resize_time'] += clock() - start
+
+        return timed
+
+    def count_probes(self, sequence: callable) -> callable:
+        """Return a probe sequence that counts every bucket it yields."""
+        counters = self.counters
+
+        def counted(home, hash, length):
+            probes = 0
+            for index in sequence(home, hash, length):
+                probes += 1
+                counters['probes'] += 1
+                if probes == 2:
+                    counters['collisions'] += 1
+                yield index
+
+        return counted
+
+
+# ------------- Snapshots ------------- #
+
+class HashMapView:
+    """
+    Read only, point in time view of a HashMap, returned by the HashMaps'
+    snapshot(). It reads a frozen copy of the map that shares the map's chains
+    or entries; the map copies a chain or entry before its first write to it
+    after the snapshot, so the view never changes and needs no locking.
+    """
+
+    def __init__(self, hash_map, map_class: type) -> None:
+        """
+        Freeze hash_map into a map_class instance with its own copy of the bucket
+        array. map_class is the plain HashMap class, so the view reads without any
+        locking or instrumentation a subclass or instance adds.
+        """
+        state = dict(vars(hash_map))
+        if hash_map._instrumentation is not None:
+            for name, original in reversed(hash_map._instrumentation.replaced()):
+                if original is None:
+                    state.pop(name, None)
+                else:
+                    state[name] = original
+
+        frozen = object.__new__(map_class)
+        for name, value in state.items():
+            setattr(frozen, name, value)
+        frozen._buckets = DynamicArray(hash_map._buckets._data)
+        frozen._size = hash_map.get_size()
+        frozen._instrumentation = None
+        frozen._owned = None
+        frozen._snapshot = None
+        self._map = frozen
+
+    def get_size(self) -> int:
+        """Return the number of keys in the view."""
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """Return the capacity the map had when the view was taken."""
+        return self._map.get_capacity()
+
+    def get(self, key: str) -> object:
+        """Return the value of key in the view, or None."""
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """Return True if key is in the view."""
+        return self._map.contains_key(key)
+
+    def get_many(self, keys) -> DynamicArray:
+        """Return a DynamicArray with the value (or None) of each key in order."""
+        return self._map.get_many(keys)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """Return a DynamicArray of (key, value) tuples."""
+        return self._map.get_keys_and_values()
+
+    def __iter__(self):
+        """Iterate over the keys, like keys()."""
+        return self._map.keys()
+
+    def keys(self):
+        """Return a generator over the keys."""
+        return self._map.keys()
+
+    def values(self):
+        """Return a generator over the values."""
+        return self._map.values()
+
+    def items(self):
+        """Return a generator over (key, value) tuples."""
+        return self._map.items()
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -103,11 +721,12 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    def __init__(self, key: str, value: object, next: "SLNode" = None, hash: int = None) -> None:
+        """Initialize node given a key and value, and optionally the key's full hash."""
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -141,7 +760,7 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, remove, contains, length, copy, iterator
     """
 
     def __init__(self) -> None:
@@ -168,20 +787,21 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> None:
+        """Insert new node at front of the list, caching the key's hash if given."""
+        self._head = SLNode(key, value, self._head, hash)
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def remove(self, key: str, hash: int = None) -> bool:
         """
-        Remove first node with matching key.
+        Remove first node with matching key. When hash is given, nodes whose
+        cached hash differs are skipped without comparing keys.
         Return True if removal was successful, False otherwise.
         """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
@@ -192,11 +812,14 @@ class LinkedList:
             previous, node = node, node.next
         return False
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match. When hash is given,
+        nodes whose cached hash differs are skipped without comparing keys.
+        """
         node = self._head
         while node:
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 return node
             node = node.next
         return node
@@ -205,19 +828,98 @@ class LinkedList:
         """Return the length of the list."""
         return self._size
 
+    def copy(self) -> "LinkedList":
+        """Return a new list with copies of the nodes, in the same order."""
+        copy = LinkedList()
+        tail = None
+        for node in self:
+            new = SLNode(node.key, node.value, None, node.hash)
+            if tail is None:
+                copy._head = new
+            else:
+                tail.next = new
+            tail = new
+        copy._size = self._size
+        return copy
+
 
 # ---------- For use in Open Addressing (OA) HashMap  ---------- #
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """Initialize an entry for use in a hash map, optionally caching the key's full hash."""
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
 
+        # Slots between the entry and its home bucket, kept by Robin Hood probing
+        self.distance = 0
+
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
         return f"K: {self.key} V: {self.value} TS: {self.is_tombstone}"
+
+    def copy(self) -> "HashEntry":
+        """Return a new entry with the same fields."""
+        copy = HashEntry(self.key, self.value, self.hash)
+        copy.is_tombstone = self.is_tombstone
+        copy.distance = self.distance
+        return copy
+
+
+# Probe sequences. Each one takes the key's home bucket, its full hash and the
+# table length, and yields the buckets to examine in order, never repeating one.
+
+def linear_probe(home: int, hash: int, length: int):
+    """Yield home, home + 1, home + 2, ... visiting every bucket exactly once."""
+    for probe in range(length):
+        yield (home + probe) % length
+
+
+def quadratic_probe(home: int, hash: int, length: int):
+    """
+    On a power of two table, yield home plus the triangular numbers 0, 1, 3, 6, ...
+    which visits every bucket exactly once. On any other (prime) table yield
+    home + i**2, which reaches (length + 1) // 2 distinct buckets before it starts
+    repeating: enough to find a free bucket while the table is under half full.
+    """
+    if length & (length - 1) == 0:
+        mask = length - 1
+        index = home
+        for probe in range(1, length + 1):
+            yield index
+            index = (index + probe) & mask
+    else:
+        for probe in range((length + 1) // 2):
+            yield (home + probe * probe) % length
+
+
+def double_hash_probe(home: int, hash: int, length: int):
+    """
+    Yield home, home + step, home + 2 * step, ... with a step taken from a
+    multiplicative mix of the hash, so keys with neighbouring hashes still take
+    different paths. The step is odd on a power of two table and in
+    [1, length - 1] on a prime one, so it is coprime with length and every bucket
+    is visited exactly once.
+    """
+    mixed = ((hash * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32
+    if length & (length - 1) == 0:
+        step = (mixed * 2 + 1) & (length - 1)
+    else:
+        step = 1 + mixed % max(length - 1, 1)
+    if math.gcd(step, length) != 1:
+        step = 1
+
+    for probe in range(length):
+        yield (home + probe * step) % length
+
+
+PROBE_SEQUENCES = {
+    'linear': linear_probe,
+    'quadratic': quadratic_probe,
+    'double_hash': double_hash_probe,
+}
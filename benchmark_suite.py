@@ -0,0 +1,273 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Workload benchmark suite comparing the separate chaining HashMap, the open
+#           addressing HashMap and the built in dict. Every workload is a scaled up version
+#           of the PDF examples. Reports ops/sec, latency percentiles and peak memory for each
+#           map and hash function, as a table or as JSON for regression tracking.
+#
+#           python benchmark_suite.py --size 5000 --json results.json
+
+
+import argparse
+from functools import partial
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from a6_include import DynamicArray, HASH_FUNCTIONS
+import hash_map_oa
+import hash_map_sc
+from benchmarks import percentile
+
+
+class DictMap:
+    """
+    Adapter that gives the built in dict the HashMap methods the workloads use.
+    resize_table() rebuilds the dict, the closest thing it has to a rehash.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty dict."""
+        self._data = {}
+
+    def put(self, key: str, value: object) -> None:
+        """Store value under key."""
+        self._data[key] = value
+
+    def get(self, key: str) -> object:
+        """Return the value for key, or None."""
+        return self._data.get(key)
+
+    def put_if_absent(self, key: str, value: object) -> object:
+        """Store value under key unless present; return the existing value or None."""
+        previous = self._data.get(key)
+        if previous is None:
+            self._data[key] = value
+        return previous
+
+    def remove(self, key: str) -> None:
+        """Remove key if present."""
+        self._data.pop(key, None)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """Rebuild the dict; new_capacity is ignored."""
+        self._data = dict(self._data)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """Return a DynamicArray of (key, value) tuples."""
+        return DynamicArray(list(self._data.items()))
+
+
+# map name -> factory taking a hash function. SC grows at load factor 1.0, as the
+# default SC map never grows and would not be a fair comparison at scale.
+MAPS = {
+    'SC': lambda function: hash_map_sc.HashMap(11, function, max_load_factor=1.0),
+    'OA': lambda function: hash_map_oa.HashMap(11, function),
+    'dict': lambda function: DictMap(),
+}
+
+
+# ------------------- WORKLOADS ---------------------------------------- #
+# Each workload fills the map it is given (untimed) and then yields the timed
+# operations one at a time as zero argument callables.
+
+def insert_heavy(m, size: int):
+    """Put size new keys into an empty map, growing it from the default capacity."""
+    for i in range(size):
+        yield partial(m.put, 'key' + str(i), i)
+
+
+def _prefill(m, size: int) -> None:
+    """Put keys key0 .. key<size - 1> into the map."""
+    for i in range(size):
+        m.put('key' + str(i), i)
+
+
+def read_heavy(m, size: int):
+    """Fill the map, then run 4 * size operations: 90% hits, 10% value updates."""
+    _prefill(m, size)
+    rng = random.Random(261)
+    for i in range(4 * size):
+        key = 'key' + str(rng.randrange(size))
+        if rng.random() < 0.9:
+            yield partial(m.get, key)
+        else:
+            yield partial(m.put, key, i)
+
+
+def miss_heavy(m, size: int):
+    """Fill the map, then look up size keys that are not in it."""
+    _prefill(m, size)
+    for i in range(size):
+        yield partial(m.get, 'miss' + str(i))
+
+
+def delete_churn(m, size: int):
+    """Fill the map, then size times remove the oldest key and put a new one."""
+    _prefill(m, size)
+    for i in range(size):
+        yield partial(m.remove, 'key' + str(i))
+        yield partial(m.put, 'key' + str(size + i), i)
+
+
+def resize_sweep(m, size: int):
+    """Fill the map, then resize it up to 16x the key count and back down to 2x."""
+    _prefill(m, size)
+    for factor in (2, 4, 8, 16, 8, 4, 2):
+        yield partial(m.resize_table, size * factor)
+
+
+def _count(m, key: str) -> None:
+    """Add one to the count stored for key, as find_mode() does."""
+    count = m.put_if_absent(key, 1)
+    if count is not None:
+        m.put(key, count + 1)
+
+
+def _mode(m) -> (str, int):
+    """Return the key with the largest count."""
+    pairs = m.get_keys_and_values()
+    best = (None, 0)
+    for ele in range(pairs.length()):
+        if pairs[ele][1] > best[1]:
+            best = pairs[ele]
+    return best
+
+
+def find_mode(m, size: int):
+    """
+    Count size values drawn from a skewed distribution over size / 10 distinct
+    strings, then scan the counts for the mode, like hash_map_sc.find_mode().
+    """
+    rng = random.Random(261)
+    distinct = max(1, size // 10)
+    values = rng.choices(range(distinct), weights=[1 / (i + 1) for i in range(distinct)], k=size)
+    for value in values:
+        yield partial(_count, m, 'v' + str(value))
+    yield partial(_mode, m)
+
+
+WORKLOADS = {
+    'insert_heavy': insert_heavy,
+    'read_heavy': read_heavy,
+    'miss_heavy': miss_heavy,
+    'delete_churn': delete_churn,
+    'resize_sweep': resize_sweep,
+    'find_mode': find_mode,
+}
+
+
+# ------------------- RUNNER ---------------------------------------- #
+
+def run_workload(workload, map_factory, size: int, measure_memory: bool = True) -> dict:
+    """
+    Run a workload on a fresh map from map_factory(), timing every operation. With
+    measure_memory the workload runs a second time under tracemalloc to record the
+    peak number of bytes allocated. Returns a dict of the results.
+    """
+    m = map_factory()
+    samples = []
+    clock = time.perf_counter
+
+    for operation in workload(m, size):
+        start = clock()
+        operation()
+        samples.append(clock() - start)
+
+    samples.sort()
+    result = {
+        'ops': len(samples),
+        'ops_per_sec': len(samples) / sum(samples) if sum(samples) else 0.0,
+        'p50_us': percentile(samples, 50) * 1e6,
+        'p99_us': percentile(samples, 99) * 1e6,
+        'p99_9_us': percentile(samples, 99.9) * 1e6,
+        'max_us': samples[-1] * 1e6,
+        'peak_bytes': None,
+    }
+
+    if measure_memory:
+        del m
+        tracemalloc.start()
+        m = map_factory()
+        for operation in workload(m, size):
+            operation()
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def run_suite(size: int = 5000, maps=tuple(MAPS), functions=('hash_function_2', 'fnv1a'),
+              workloads=tuple(WORKLOADS), measure_memory: bool = True) -> list:
+    """
+    Run every workload for every map and hash function. dict uses Python's own hash,
+    so it runs once per workload with the function reported as 'builtin'. Returns a
+    list of result dicts, each also naming its map, function, workload and size.
+    """
+    results = []
+
+    for workload in workloads:
+        for map_name in maps:
+            for function in (('builtin',) if map_name == 'dict' else functions):
+                result = {'workload': workload, 'map': map_name, 'function': function, 'size': size}
+                result.update(run_workload(WORKLOADS[workload], partial(MAPS[map_name], function),
+                                           size, measure_memory))
+                results.append(result)
+
+    return results
+
+
+def print_results(results: list) -> None:
+    """Print suite results as one table per workload."""
+    workload = None
+    for result in results:
+        if result['workload'] != workload:
+            workload = result['workload']
+            title = f"{workload} - {result['size']} keys"
+            print("\n" + title)
+            print("-" * len(title))
+            print(f"{'map':>5} {'function':>15} {'ops':>7} {'ops/s':>10} {'p50 us':>8} "
+                  f"{'p99 us':>8} {'p99.9 us':>9} {'max us':>10} {'peak KiB':>9}")
+        peak = '-' if result['peak_bytes'] is None else f"{result['peak_bytes'] / 1024:.0f}"
+        print(f"{result['map']:>5} {result['function']:>15} {result['ops']:>7} "
+              f"{result['ops_per_sec']:>10.0f} {result['p50_us']:>8.2f} {result['p99_us']:>8.2f} "
+              f"{result['p99_9_us']:>9.2f} {result['max_us']:>10.2f} {peak:>9}")
+
+
+def main(argv=None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the SC and OA HashMaps against dict.")
+    parser.add_argument('--size', type=int, default=5000, help="keys per workload (default 5000)")
+    parser.add_argument('--maps', nargs='+', choices=MAPS, default=list(MAPS))
+    parser.add_argument('--functions', nargs='+', choices=HASH_FUNCTIONS,
+                        default=['hash_function_2', 'fnv1a'])
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--json', metavar='PATH',
+                        help="write the results as JSON to PATH, '-' for stdout instead of the table")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.size, args.maps, args.functions, args.workloads, not args.no_memory)
+
+    if args.json != '-':
+        print_results(results)
+    if args.json:
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'results': results,
+        }
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, 'w') as file:
+                json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
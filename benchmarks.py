@@ -0,0 +1,340 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Benchmarks for the HashMap implementations. Run this file directly to print
+#           every benchmark, or import the individual benchmark functions.
+
+
+import itertools
+import math
+import multiprocessing
+import time
+
+from a6_include import (DynamicArray, HASH_FUNCTIONS, hash_function_1, hash_function_2,
+                        next_prime)
+import hash_map_oa
+import hash_map_oa_compact
+import hash_map_sc
+
+
+def _time_lookups(m, keys: list) -> float:
+    """
+    Return the mean time in microseconds of m.get() over keys.
+    """
+    start = time.perf_counter()
+    for key in keys:
+        m.get(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def percentile(samples: list, percent: float) -> float:
+    """
+    Return the given percentile of an already sorted list of samples.
+    """
+    index = min(len(samples) - 1, int(len(samples) * percent / 100))
+    return samples[index]
+
+
+def put_latency_benchmark(map_factory, count: int = 20000) -> (float, float, float, float):
+    """
+    Time every put() while inserting count new keys into the map returned by
+    map_factory(). Returns the (p50, p99, p99.99, max) latency in microseconds.
+    """
+    m = map_factory()
+    keys = ['key' + str(i) for i in range(count)]
+    samples = []
+    clock = time.perf_counter
+
+    for ele in range(count):
+        start = clock()
+        m.put(keys[ele], ele)
+        samples.append(clock() - start)
+
+    samples.sort()
+    return tuple(percentile(samples, percent) * 1e6 for percent in (50, 99, 99.99, 100))
+
+
+def probing_benchmark(map_factory, count: int = 20000) -> (float, int, float, float, float):
+    """
+    Insert count keys into the map returned by map_factory(), then look all of them
+    up and look up count missing keys. Returns (mean probe length, max probe length,
+    put ops/sec, hit ops/sec, miss ops/sec).
+    """
+    m = map_factory()
+    keys = ['key' + str(i) for i in range(count)]
+    misses = ['miss' + str(i) for i in range(count)]
+
+    start = time.perf_counter()
+    for ele in range(count):
+        m.put(keys[ele], ele)
+    put_time = time.perf_counter() - start
+
+    hit_time = _time_lookups(m, keys) * count / 1e6
+    miss_time = _time_lookups(m, misses) * count / 1e6
+
+    lengths = m.probe_lengths()
+    total, longest = 0, 0
+    for ele in range(lengths.length()):
+        total += lengths[ele]
+        longest = max(longest, lengths[ele])
+
+    return total / lengths.length(), longest, count / put_time, count / hit_time, count / miss_time
+
+
+def capacity_mode_benchmark(map_factory, count: int = 20000) -> (int, float, float, float, float):
+    """
+    Insert count keys into the map returned by map_factory(), then look all of them
+    up. Returns (capacity, load factor, share of empty buckets, put ops/sec, get ops/sec).
+    """
+    m = map_factory()
+    keys = ['key' + str(i) for i in range(count)]
+
+    start = time.perf_counter()
+    for ele in range(count):
+        m.put(keys[ele], ele)
+    put_time = time.perf_counter() - start
+
+    get_time = _time_lookups(m, keys) * count / 1e6
+
+    return (m.get_capacity(), m.table_load(), m.empty_buckets() / m.get_capacity(),
+            count / put_time, count / get_time)
+
+
+def churn_benchmark(map_class=hash_map_oa.HashMap, function=hash_function_2,
+                    size: int = 2000, rounds: int = 10, round_ops: int = 2000) -> DynamicArray:
+    """
+    Fill an open addressing map with size keys, then run rounds of put/remove churn.
+    Each round removes round_ops of the oldest keys and adds round_ops new ones, so the
+    live size stays constant while tombstones pile up. After every round a fixed set of
+    hit and miss lookups is timed. Returns a DynamicArray of
+    (round, tombstones, occupancy, hit_us, miss_us) tuples.
+    """
+    m = map_class(11, function)
+    for i in range(size):
+        m.put('key' + str(i), i)
+
+    results = DynamicArray()
+    oldest, newest = 0, size
+
+    for rnd in range(1, rounds + 1):
+        for _ in range(round_ops):
+            m.remove('key' + str(oldest))
+            m.put('key' + str(newest), newest)
+            oldest += 1
+            newest += 1
+
+        hits = ['key' + str(i) for i in range(oldest, newest)]
+        misses = ['miss' + str(i) for i in range(size)]
+        results.append((rnd, m.get_tombstones(), m.table_occupancy(),
+                        _time_lookups(m, hits), _time_lookups(m, misses)))
+
+    return results
+
+
+def instrumentation_benchmark(map_factory, count: int = 20000) -> (float, float, dict):
+    """
+    Run count puts and count gets on a plain map from map_factory() and on one with
+    instrumentation enabled. Returns (plain ops/sec, instrumented ops/sec, counters).
+    """
+    keys = ['key' + str(i) for i in range(count)]
+    results = []
+
+    for instrumented in (False, True):
+        m = map_factory()
+        stats = m.enable_instrumentation() if instrumented else None
+        start = time.perf_counter()
+        for ele in range(count):
+            m.put(keys[ele], ele)
+        for key in keys:
+            m.get(key)
+        results.append(2 * count / (time.perf_counter() - start))
+
+    return results[0], results[1], stats.snapshot()
+
+
+def parallel_resize_benchmark(map_factory, count: int = 200000, worker_counts=(1, 2, 4)) -> DynamicArray:
+    """
+    Fill a map from map_factory() with count keys and time resize_table() to 4x the
+    key count, then do the same with parallel_resize_table() for each worker count,
+    on a fresh map each time. The pool is started before the clock, since a caller
+    resizing often would keep one around. With NumPy installed the bucket indices
+    are vectorized, and below PARALLEL_BUCKET_MIN keys they are computed serially,
+    so in both cases the worker count makes no difference. Returns a DynamicArray
+    of (mode, seconds).
+    """
+    keys = ['key' + str(i) for i in range(count)]
+    results = DynamicArray()
+
+    def filled():
+        m = map_factory()
+        for ele in range(count):
+            m.put(keys[ele], ele)
+        return m
+
+    m = filled()
+    start = time.perf_counter()
+    m.resize_table(4 * count)
+    results.append(('resize_table', time.perf_counter() - start))
+
+    for workers in worker_counts:
+        m = filled()
+        pool = multiprocessing.Pool(workers) if workers > 1 else None
+        start = time.perf_counter()
+        m.parallel_resize_table(4 * count, workers, pool)
+        results.append((f'workers={workers}', time.perf_counter() - start))
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return results
+
+
+def hash_quality_report(keys: list, capacity: int = None,
+                        functions: dict = HASH_FUNCTIONS) -> DynamicArray:
+    """
+    Hash keys with every function in functions and bucket the hashes into capacity
+    buckets (default: the next prime at or above len(keys)). Returns a DynamicArray of
+    (name, collisions, empty share, max bucket, chi-squared / (buckets - 1)) tuples.
+    collisions counts keys whose full hash equals an earlier key's. The last column is
+    about 1 for a uniform hash and grows as buckets clump.
+    """
+    capacity = capacity or next_prime(len(keys))
+    expected = len(keys) / capacity
+    results = DynamicArray()
+
+    for name, function in functions.items():
+        hashes = [function(key) for key in keys]
+        counts = [0] * capacity
+        for hash in hashes:
+            counts[hash % capacity] += 1
+
+        chi_squared = sum((count - expected) ** 2 for count in counts) / expected
+        results.append((name, len(hashes) - len(set(hashes)), counts.count(0) / capacity,
+                        max(counts), chi_squared / (capacity - 1)))
+
+    return results
+
+
+# ------------------- BENCHMARKS ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    quality_keys = (
+        ('key<n>', ['key' + str(i) for i in range(5000)]),
+        ('numbers', [str(i) for i in range(5000)]),
+        ('anagrams', [''.join(p) for p in itertools.permutations('abcdefg')]),
+    )
+    for key_set, keys in quality_keys:
+        print(f"\nHash quality - {len(keys)} {key_set} keys")
+        print("--------------------------------------")
+        print(f"{'function':>15} {'collisions':>10} {'empty':>6} {'max':>5} {'chi2/df':>9}")
+        results = hash_quality_report(keys)
+        for ele in range(results.length()):
+            name, collisions, empty, longest, score = results[ele]
+            print(f"{name:>15} {collisions:>10} {empty:>6.2f} {longest:>5} {score:>9.2f}")
+
+    for map_class in (hash_map_oa.HashMap, hash_map_oa_compact.CompactHashMap):
+        print(f"\nChurn - {map_class.__module__}.{map_class.__name__}")
+        print("------------------------------------------------")
+        print(f"{'round':>5} {'tombstones':>10} {'occupancy':>9} {'hit us':>8} {'miss us':>8}")
+        results = churn_benchmark(map_class)
+        for ele in range(results.length()):
+            rnd, tombstones, occupancy, hit_us, miss_us = results[ele]
+            print(f"{rnd:>5} {tombstones:>10} {occupancy:>9.2f} {hit_us:>8.2f} {miss_us:>8.2f}")
+
+    print("\nDistribution - analyze() after 5000 puts")
+    print("----------------------------------------")
+    print(f"{'map':>4} {'hash':>15} {'mean':>7} {'p50':>5} {'p99':>5} {'max':>5} {'chi2/df':>9}  fullest buckets")
+    analyzed_maps = (
+        ('SC', lambda function: hash_map_sc.HashMap(11, function, max_load_factor=1.0)),
+        ('OA', lambda function: hash_map_oa.HashMap(11, function)),
+    )
+    for name, build in analyzed_maps:
+        for function in ('hash_function_1', 'hash_function_2', 'fnv1a'):
+            m = build(function)
+            for i in range(5000):
+                m.put('key' + str(i), i)
+            report = m.analyze(top=3)
+            print(f"{name:>4} {function:>15} {report.mean:>7.2f} {report.percentile(50):>5} "
+                  f"{report.percentile(99):>5} {report.max:>5} {report.uniformity:>9.2f}  {report.top_buckets}")
+
+    print("\nInstrumentation - overhead and counters (fnv1a, 5000 keys)")
+    print("----------------------------------------------------------")
+    print(f"{'map':>4} {'plain/s':>9} {'counted/s':>9}  counters")
+    for name, factory in (('SC', lambda: hash_map_sc.HashMap(11, 'fnv1a', max_load_factor=1.0)),
+                          ('OA', lambda: hash_map_oa.HashMap(11, 'fnv1a'))):
+        plain, counted, counters = instrumentation_benchmark(factory, count=5000)
+        counters['resize_time'] = round(counters['resize_time'], 4)
+        print(f"{name:>4} {plain:>9.0f} {counted:>9.0f}  {counters}")
+
+    print("\nProbing - probe sequences and Robin Hood")
+    print("----------------------------------------")
+    print(f"{'hash':>15} {'mode':>11} {'mean probe':>10} {'max probe':>9} "
+          f"{'put/s':>9} {'hit/s':>9} {'miss/s':>9}")
+    probe_modes = (
+        ('quadratic', {}),
+        ('linear', {'probing': 'linear'}),
+        ('double hash', {'probing': 'double_hash'}),
+        ('robin hood', {'robin_hood': True}),
+    )
+    for function in (hash_function_1, hash_function_2):
+        for mode, options in probe_modes:
+            mean, longest, puts, hits, misses = probing_benchmark(
+                lambda: hash_map_oa.HashMap(11, function, **options), count=2000)
+            print(f"{function.__name__:>15} {mode:>11} {mean:>10.2f} {longest:>9} "
+                  f"{puts:>9.0f} {hits:>9.0f} {misses:>9.0f}")
+
+    print("\nCapacity - prime vs power of two")
+    print("--------------------------------")
+    print(f"{'map':>4} {'hash':>15} {'mode':>6} {'capacity':>8} {'load':>5} {'empty':>6} "
+          f"{'ideal':>6} {'put/s':>9} {'get/s':>9}")
+    capacity_maps = (
+        ('SC', lambda function, power_of_two: hash_map_sc.HashMap(
+            11, function, max_load_factor=1.0, power_of_two=power_of_two)),
+        ('OA', lambda function, power_of_two: hash_map_oa.HashMap(
+            11, function, power_of_two=power_of_two)),
+    )
+    for name, build in capacity_maps:
+        for function in (hash_function_1, hash_function_2):
+            for mode, power_of_two in (('prime', False), ('pow2', True)):
+                capacity, load, empty, puts, gets = capacity_mode_benchmark(
+                    lambda: build(function, power_of_two), count=5000)
+                # a uniform hash leaves e^-load of the chains empty, or 1 - load of the slots
+                ideal = math.exp(-load) if name == 'SC' else 1 - load
+                print(f"{name:>4} {function.__name__:>15} {mode:>6} {capacity:>8} {load:>5.2f} {empty:>6.2f} "
+                      f"{ideal:>6.2f} {puts:>9.0f} {gets:>9.0f}")
+
+    print("\nPut latency - open addressing resize modes (us)")
+    print("------------------------------------------------")
+    print(f"{'mode':>12} {'p50':>8} {'p99':>8} {'p99.99':>8} {'max':>10}")
+    oa_modes = (
+        ('stop-world', lambda: hash_map_oa.HashMap(11, hash_function_2)),
+        ('incremental', lambda: hash_map_oa.HashMap(11, hash_function_2, incremental_resize=True)),
+    )
+    for mode, factory in oa_modes:
+        p50, p99, p9999, worst = put_latency_benchmark(factory)
+        print(f"{mode:>12} {p50:>8.2f} {p99:>8.2f} {p9999:>8.2f} {worst:>10.2f}")
+
+    print("\nPut latency - separate chaining resize modes (us)")
+    print("--------------------------------------------------")
+    print(f"{'mode':>12} {'p50':>8} {'p99':>8} {'p99.99':>8} {'max':>10}")
+    sc_modes = (
+        ('stop-world', lambda: hash_map_sc.HashMap(11, hash_function_2, max_load_factor=1.0)),
+        ('incremental', lambda: hash_map_sc.HashMap(11, hash_function_2, max_load_factor=1.0,
+                                                     incremental_resize=True)),
+    )
+    for mode, factory in sc_modes:
+        p50, p99, p9999, worst = put_latency_benchmark(factory)
+        print(f"{mode:>12} {p50:>8.2f} {p99:>8.2f} {p9999:>8.2f} {worst:>10.2f}")
+
+    print(f"\nResize - resize_table() against parallel_resize_table() ({multiprocessing.cpu_count()} CPUs)")
+    print("----------------------------------------------------------------")
+    print(f"{'map':>4} {'mode':>14} {'seconds':>9}")
+    resized_maps = (
+        ('SC', lambda: hash_map_sc.HashMap(11, 'fnv1a', max_load_factor=1.0)),
+        ('OA', lambda: hash_map_oa.HashMap(11, 'fnv1a')),
+    )
+    for name, factory in resized_maps:
+        results = parallel_resize_benchmark(factory)
+        for ele in range(results.length()):
+            mode, seconds = results[ele]
+            print(f"{name:>4} {mode:>14} {seconds:>9.3f}")
@@ -0,0 +1,521 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Thread safe separate chaining HashMap. The buckets are guarded by a fixed
+#           set of striped locks, bucket i by lock i % stripes, so operations on keys in
+#           different stripes never wait on each other. Resizes take every stripe lock in
+#           order, which makes them wait for in-flight operations and makes operations
+#           that started on the old bucket array retry on the new one.
+
+
+import sys
+import threading
+import time
+
+from a6_include import DynamicArray, LinkedList, hash_function_1
+from hash_map_sc import HashMap
+
+
+class ConcurrentHashMap(HashMap):
+    """
+    Separate chaining HashMap that is safe to share between threads. Accepts the
+    HashMap constructor options, except incremental_resize, plus stripes, the
+    number of locks the buckets are spread over.
+
+    The size is kept as one count per stripe, updated under that stripe's lock.
+    get_size() adds them up without locking, so while other threads are writing it
+    is only a momentary value. keys(), values(), items() and get_keys_and_values()
+    copy the entries under every lock and return a point in time view. The
+    Instrumentation counters are not locked and may undercount under contention.
+    """
+
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1, stripes: int = 16,
+                 **options) -> None:
+        """
+        Initialize new ConcurrentHashMap with stripes locks.
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        if options.get('incremental_resize'):
+            raise ValueError("ConcurrentHashMap resizes under all stripe locks and "
+                             "does not support incremental_resize")
+
+        super().__init__(capacity, function, **options)
+        self._stripe_count = stripes
+        self._locks = tuple(threading.Lock() for _ in range(stripes))
+        self._sizes = [0] * stripes
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._sizes)
+
+    def table_load(self) -> float:
+        """
+        Method to return the load factor (ie. average size of each bucket).
+        """
+        return self.get_size() / self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _acquire(self, hash: int) -> (int, int):
+        """
+        Helper that locks the stripe of the bucket a hash maps to and returns
+        (stripe, bucket index). If a resize replaced the bucket array while it
+        waited for the lock, it lets go and tries again on the new array. The
+        caller must release self._locks[stripe].
+        """
+        while True:
+            buckets = self._buckets
+            index = self._home(hash, buckets.length())
+            stripe = index % self._stripe_count
+            lock = self._locks[stripe]
+            lock.acquire()
+            if self._buckets is buckets:
+                return stripe, index
+            lock.release()
+
+    def _lock_all(self) -> None:
+        """
+        Helper that takes every stripe lock, always in the same order so that two
+        threads doing it cannot deadlock
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Helper that releases every stripe lock
+        """
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def _put_hashed(self, key: str, value: object, hash: int, overwrite: bool = True) -> object:
+        """
+        Helper for put() that takes an already computed hash for the key and holds
+        the key's stripe lock while it updates the chain. Returns the previous
+        value or None.
+        """
+        stripe, index = self._acquire(hash)
+        try:
+            current = self._buckets.get_at_index(index)
+            node = current.contains(key, hash)
+            if node is not None and not overwrite:
+                return node.value
+
+            chain = self._writable_chain(self._buckets, index)
+            if chain is not current and node is not None:
+                node = chain.contains(key, hash)
+            if node is None:
+                chain.insert(key, value, hash)
+                self._sizes[stripe] += 1
+                return None
+
+            previous, node.value = node.value, value
+            return previous
+        finally:
+            self._locks[stripe].release()
+
+    def _get_hashed(self, key: str, hash: int) -> object:
+        """
+        Helper for get() that takes an already computed hash for the key and holds
+        the key's stripe lock while it walks the chain.
+        """
+        stripe, index = self._acquire(hash)
+        try:
+            node = self._buckets.get_at_index(index).contains(key, hash)
+            if node:
+                return node.value
+        finally:
+            self._locks[stripe].release()
+
+    def _remove_hashed(self, key: str, hash: int) -> None:
+        """
+        Helper for remove() that takes an already computed hash for the key and holds
+        the key's stripe lock while it unlinks the node.
+        """
+        stripe, index = self._acquire(hash)
+        try:
+            if self._writable_chain(self._buckets, index).remove(key, hash):
+                self._sizes[stripe] -= 1
+        finally:
+            self._locks[stripe].release()
+
+    def put_many(self, keys, values) -> None:
+        """
+        Method to add a batch of key/value pairs to the hash map. Hashes the whole
+        batch at once, then inserts each pair as put() would. Returns None.
+        """
+        keys, values = list(keys), list(values)
+        if len(keys) != len(values):
+            raise ValueError("put_many() needs the same number of keys and values")
+
+        hashes = self._hash_keys(keys)
+        for ele in range(len(keys)):
+            self._put_hashed(keys[ele], values[ele], hashes[ele])
+            self._grow()
+
+    # ------------------------------------------------------------------ #
+
+    def _grow(self) -> None:
+        """
+        Helper that doubles the capacity once the load factor goes above
+        max_load_factor. Threads that see the same overfull table double it once.
+        """
+        capacity = self._capacity
+        if self._max_load_factor is not None and self.get_size() / capacity > self._max_load_factor:
+            self._resize_from(capacity, capacity * 2)
+
+    def _shrink(self) -> None:
+        """
+        Helper that halves the capacity, as often as needed, while the load factor is
+        below min_load_factor. Never shrinks under the initial capacity, nor to a
+        capacity the next put() would have to grow again.
+        """
+        if self._min_load_factor is None:
+            return
+
+        size, current = self.get_size(), self._capacity
+        capacity = current
+        while size / capacity < self._min_load_factor and capacity // 2 >= self._min_capacity:
+            smaller = self._round_capacity(capacity // 2)
+            if (size + 1) / smaller > self._max_load_factor:
+                break
+            capacity = smaller
+        if capacity != current:
+            self._resize_from(current, capacity)
+
+    def _resize_from(self, expected: int, new_capacity: int) -> None:
+        """
+        Helper for the automatic resizes. Takes every lock and resizes only if the
+        capacity is still expected, so a resize another thread finished while this
+        one waited is not repeated.
+        """
+        self._lock_all()
+        try:
+            if self._capacity == expected:
+                self._rebuild(self._round_capacity(new_capacity))
+        finally:
+            self._unlock_all()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method that re-maps the hash table to the next prime (or power of two) at
+        least new_capacity. Waits for the operations holding a stripe lock, and
+        blocks new ones, until the entries have been moved.
+        """
+        if new_capacity < 1:
+            return
+
+        self._lock_all()
+        try:
+            self._rebuild(self._round_capacity(new_capacity))
+        finally:
+            self._unlock_all()
+
+    def parallel_resize_table(self, new_capacity: int, workers: int = 1, pool=None) -> None:
+        """
+        Method that re-maps the hash table like parallel_resize_table() of the
+        plain HashMap, holding every lock, and recounts the stripe sizes.
+        """
+        if new_capacity < 1:
+            return
+
+        self._lock_all()
+        try:
+            super().parallel_resize_table(new_capacity, workers, pool)
+            sizes = [0] * self._stripe_count
+            for index in range(self._capacity):
+                sizes[index % self._stripe_count] += self._buckets.get_at_index(index).length()
+            self._sizes = sizes
+        finally:
+            self._unlock_all()
+
+    def _rebuild(self, capacity: int) -> None:
+        """
+        Helper that moves every entry into a new bucket array of the given capacity,
+        using the cached hashes, and recounts the stripe sizes. Must hold every lock.
+        The new array is published last, which is what waiting operations check.
+        """
+        buckets = DynamicArray([LinkedList() for _ in range(capacity)])
+        sizes = [0] * self._stripe_count
+        old_array = self._buckets
+
+        for bucket in range(old_array.length()):
+            for node in old_array.get_at_index(bucket):
+                index = self._home(node.hash, capacity)
+                buckets.get_at_index(index).insert(node.key, node.value, node.hash)
+                sizes[index % self._stripe_count] += 1
+
+        self._capacity = capacity
+        self._sizes = sizes
+        self._modifications += 1
+        self._owned = None
+        self._buckets = buckets
+
+    def clear(self) -> None:
+        """
+        Method that clears all of the contents of the Hash Map to reset it to
+        being empty.
+        """
+        self._lock_all()
+        try:
+            self._sizes = [0] * self._stripe_count
+            self._modifications += 1
+            self._snapshot = None
+            self._owned = None
+            self._buckets = DynamicArray([LinkedList() for _ in range(self._capacity)])
+        finally:
+            self._unlock_all()
+
+    # ------------------------------------------------------------------ #
+
+    def empty_buckets(self) -> int:
+        """
+        Method that returns how many buckets are empty, counted under every lock.
+        """
+        self._lock_all()
+        try:
+            return super().empty_buckets()
+        finally:
+            self._unlock_all()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method that returns a DynamicArray of (key, value) tuples, copied under
+        every lock so it is a consistent point in time view.
+        """
+        self._lock_all()
+        try:
+            return super().get_keys_and_values()
+        finally:
+            self._unlock_all()
+
+    def _nodes(self):
+        """
+        Helper generator over the nodes. The nodes are copied under every lock
+        first, so other threads can keep writing while the caller iterates.
+        """
+        self._lock_all()
+        try:
+            buckets = self._buckets
+            nodes = [node for ele in range(buckets.length()) for node in buckets.get_at_index(ele)]
+        finally:
+            self._unlock_all()
+        return iter(nodes)
+
+    def snapshot(self):
+        """
+        Method that returns a read only, point in time view of the hash map, taken
+        under every lock. Reads on the view take no locks at all. While nothing was
+        written since the last snapshot it is returned again without locking.
+        """
+        view = self._snapshot
+        if view is not None:
+            return view
+
+        self._lock_all()
+        try:
+            return super().snapshot()
+        finally:
+            self._unlock_all()
+
+    def analyze(self, top: int = 5):
+        """
+        Method that measures how the keys are spread over the buckets, under every
+        lock. Returns a DistributionReport.
+        """
+        self._lock_all()
+        try:
+            return super().analyze(top)
+        finally:
+            self._unlock_all()
+
+
+# ------------------- STRESS TEST AND BENCHMARK ---------------------------------------- #
+
+def _run_threads(targets: list) -> float:
+    """
+    Start one thread per zero argument callable, wait for all of them and return
+    the wall clock seconds they took.
+    """
+    threads = [threading.Thread(target=target) for target in targets]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def stress_test(threads: int = 8, keys_per_thread: int = 2000, stripes: int = 16) -> bool:
+    """
+    Have threads writers put, overwrite and remove their own keys, while the map
+    grows from its default capacity and another thread forces a resize every 5 ms.
+    Returns True if every surviving key holds its last written value and the size
+    matches, so no update was lost.
+    """
+    m = ConcurrentHashMap(11, 'fnv1a', stripes=stripes, max_load_factor=1.0)
+    done = threading.Event()
+
+    def writer(thread: int) -> callable:
+        def run() -> None:
+            for i in range(keys_per_thread):
+                m.put(f't{thread}-{i}', i)
+            for i in range(keys_per_thread):
+                m.put(f't{thread}-{i}', -i)
+            for i in range(0, keys_per_thread, 2):
+                m.remove(f't{thread}-{i}')
+        return run
+
+    # forced resizes alternate between two capacities that both fit every key, so
+    # they race with the writers' own growth early on without undoing it later
+    def resizer() -> None:
+        capacities = (2 * threads * keys_per_thread, 3 * threads * keys_per_thread)
+        resizes = 0
+        while not done.wait(0.005):
+            m.resize_table(capacities[resizes % 2])
+            resizes += 1
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-4)
+    try:
+        background = threading.Thread(target=resizer)
+        background.start()
+        _run_threads([writer(thread) for thread in range(threads)])
+        done.set()
+        background.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    expected = {f't{thread}-{i}': -i for thread in range(threads) for i in range(1, keys_per_thread, 2)}
+    return m.get_size() == len(expected) and dict(m.items()) == expected
+
+
+def snapshot_stress_test(readers: int = 4, writes: int = 20000) -> bool:
+    """
+    One writer stores a counter under 'a' and then under 'b', so at any point in
+    time 'a' is 'b' or 'b' + 1. Reader threads keep taking snapshots and check that
+    every snapshot shows such a state. Returns True if none saw a torn write.
+    """
+    m = ConcurrentHashMap(11, 'fnv1a', stripes=16, max_load_factor=1.0)
+    m.put('a', 0)
+    m.put('b', 0)
+    done = threading.Event()
+    torn = []
+
+    def writer() -> None:
+        for i in range(1, writes + 1):
+            m.put('a', i)
+            m.put('b', i)
+            m.put('filler' + str(i), i)
+        done.set()
+
+    def reader() -> None:
+        while not done.is_set():
+            view = m.snapshot()
+            a, b = view.get('a'), view.get('b')
+            if a - b not in (0, 1):
+                torn.append((a, b))
+
+    _run_threads([writer] + [reader] * readers)
+    return not torn and m.snapshot().get_size() == writes + 2
+
+
+def read_view_benchmark(readers: int = 4, gets: int = 100000, keys: int = 20000,
+                        reads_per_write: int = 1000) -> (float, float):
+    """
+    Time reader threads doing gets gets in total, with one put for every
+    reads_per_write gets, once calling get() on the map, which takes a stripe lock
+    per call, and once calling get() on a snapshot that each reader refreshes
+    every reads_per_write gets. Returns (locked gets/s, snapshot gets/s).
+    """
+    results = []
+
+    for use_snapshot in (False, True):
+        m = ConcurrentHashMap(11, 'fnv1a', expected_size=keys, max_load_factor=1.0)
+        for i in range(keys):
+            m.put('key' + str(i), i)
+
+        def reader(seed: int) -> callable:
+            def run() -> None:
+                view = m.snapshot() if use_snapshot else m
+                for i in range(seed, gets, readers):
+                    if i % reads_per_write == seed:
+                        if seed == 0:
+                            m.put('key' + str(i % keys), i)
+                        if use_snapshot:
+                            view = m.snapshot()
+                    view.get('key' + str(i * 7919 % keys))
+            return run
+
+        results.append(gets / _run_threads([reader(seed) for seed in range(readers)]))
+
+    return results[0], results[1]
+
+
+def throughput_benchmark(thread_counts=(1, 2, 4, 8), operations: int = 200000, keys: int = 20000,
+                         stripes: int = 16) -> list:
+    """
+    Time a read-mostly mix (90% get, 10% put) of operations operations, split
+    between each number of threads, against the striped map and the same map with
+    a single lock. Returns a list of (threads, striped ops/s, single lock ops/s).
+    On a GIL build the threads still take turns, so this mostly measures locking
+    overhead; the gap between the two opens up on a free-threaded build.
+    """
+    results = []
+
+    for count in thread_counts:
+        row = [count]
+        for stripe_count in (stripes, 1):
+            m = ConcurrentHashMap(11, 'fnv1a', stripes=stripe_count, expected_size=keys, max_load_factor=1.0)
+            for i in range(keys):
+                m.put('key' + str(i), i)
+
+            def worker(seed: int) -> callable:
+                def run() -> None:
+                    for i in range(seed, operations, count):
+                        key = 'key' + str(i * 7919 % keys)
+                        if i % 10:
+                            m.get(key)
+                        else:
+                            m.put(key, i)
+                return run
+
+            row.append(operations / _run_threads([worker(seed) for seed in range(count)]))
+        results.append(tuple(row))
+
+    return results
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - concurrent put example")
+    print("----------------------------")
+    m = ConcurrentHashMap(53, stripes=4)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nConcurrent - stress test (lost updates)")
+    print("---------------------------------------")
+    print(stress_test())
+
+    print("\nConcurrent - snapshot stress test (torn reads)")
+    print("----------------------------------------------")
+    print(snapshot_stress_test())
+
+    print("\nConcurrent - locked get() against snapshot get()")
+    print("------------------------------------------------")
+    locked, snapshot = read_view_benchmark()
+    print(f"{'locked':>10} {locked:>10.0f} gets/s")
+    print(f"{'snapshot':>10} {snapshot:>10.0f} gets/s")
+
+    print("\nConcurrent - throughput (90% get / 10% put)")
+    print("-------------------------------------------")
+    print(f"{'threads':>8} {'16 stripes':>12} {'1 lock':>12}")
+    for count, striped, single in throughput_benchmark():
+        print(f"{count:>8} {striped:>12.0f} {single:>12.0f}")
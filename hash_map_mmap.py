@@ -0,0 +1,308 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: On-disk open addressing table. write_mapped_table() lays an open addressing
+#           HashMap out as a binary file: a header, a slot array of cached hashes and blob
+#           offsets, and the key/value blobs. MappedHashMap opens that file with mmap and
+#           answers get() by probing the mapped slot array, so loading it costs no rehashing
+#           and no deserialization beyond the values that are actually read. Values are
+#           pickled, so only map files from a trusted source.
+#
+#           File layout (little endian):
+#             header   magic 'A6OA', version, flags, capacity, size, probing, hash function
+#             slots    capacity x (hash: u64, blob offset: u64), offset 0 = empty slot
+#             blobs    per entry: key length u32, value length u32, UTF-8 key, pickled value
+
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import time
+
+from a6_include import HASH_FUNCTIONS, PROBE_SEQUENCES, mix_hash
+from hash_map_oa import HashMap
+
+
+MAGIC = b'A6OA'
+VERSION = 1
+
+# flags
+POWER_OF_TWO = 1
+
+_HEADER = struct.Struct('<4sHHQQ16s32s')
+_BLOB = struct.Struct('<II')
+_SLOT_SIZE = 16
+_MASK64 = (1 << 64) - 1
+
+# hash functions whose value depends on a per-process key cannot be reopened later
+_PROCESS_KEYED = ('siphash',)
+
+
+def _function_name(function: callable) -> str:
+    """
+    Return the HASH_FUNCTIONS name of function, which the file records so the
+    reader can hash lookup keys the same way.
+    """
+    for name, registered in HASH_FUNCTIONS.items():
+        if registered is function and name not in _PROCESS_KEYED:
+            return name
+    raise ValueError("the map must use a hash function from HASH_FUNCTIONS that is stable "
+                     f"across processes: {', '.join(n for n in HASH_FUNCTIONS if n not in _PROCESS_KEYED)}")
+
+
+def write_mapped_table(hash_map: HashMap, path: str) -> None:
+    """
+    Write the live entries of an open addressing HashMap to path in the mapped table
+    format. The entries are laid out in a fresh table under half full, using the
+    hashes cached in the entries, the map's probe sequence and its capacity mode.
+    Keys must be strings and values must be picklable. Blobs are streamed to the
+    file; only the slot array is built in memory.
+    """
+    function = _function_name(hash_map._hash_function)
+    probing = hash_map._probing
+    power_of_two = hash_map._power_of_two
+    sequence = PROBE_SEQUENCES[probing]
+
+    size = hash_map.get_size()
+    capacity = hash_map._round_capacity(2 * size + 1)
+    slots = [0] * (2 * capacity)
+    offset = _HEADER.size + _SLOT_SIZE * capacity
+
+    with open(path, 'wb') as file:
+        file.seek(offset)
+
+        for entry in hash_map._entries():
+            key = entry.key.encode('utf-8')
+            value = pickle.dumps(entry.value, pickle.HIGHEST_PROTOCOL)
+            home = entry.hash & (capacity - 1) if power_of_two else entry.hash % capacity
+
+            for index in sequence(home, entry.hash, capacity):
+                if slots[2 * index + 1] == 0:
+                    slots[2 * index] = entry.hash & _MASK64
+                    slots[2 * index + 1] = offset
+                    break
+            else:
+                raise RuntimeError("probe sequence found no free slot")
+
+            file.write(_BLOB.pack(len(key), len(value)))
+            file.write(key)
+            file.write(value)
+            offset += _BLOB.size + len(key) + len(value)
+
+        file.seek(0)
+        file.write(_HEADER.pack(MAGIC, VERSION, POWER_OF_TWO if power_of_two else 0, capacity, size,
+                                probing.encode('ascii'), function.encode('ascii')))
+        file.write(struct.pack(f'<{2 * capacity}Q', *slots))
+
+
+class MappedHashMap:
+    """
+    Read only open addressing HashMap backed by a file written by
+    write_mapped_table(). Opening maps the file and reads only the header;
+    every get() probes the mapped slot array and unpickles just the value
+    it returns. Unpickling can run arbitrary code, so only open table files
+    from a trusted source.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Map the table file at path. Raises ValueError if it is not a mapped table.
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is not a mapped hash table") from None
+
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a mapped hash table")
+        magic, version, flags, capacity, size, probing, function = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} mapped hash table")
+        if len(self._map) < _HEADER.size + _SLOT_SIZE * capacity:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+
+        self._capacity = capacity
+        self._size = size
+        self._power_of_two = bool(flags & POWER_OF_TWO)
+        self._probe_sequence = PROBE_SEQUENCES[probing.rstrip(b'\0').decode('ascii')]
+        self._hash_function = HASH_FUNCTIONS[function.rstrip(b'\0').decode('ascii')]
+        # the slot array is read in place as native u64s, which match the file on little endian hosts
+        if sys.byteorder != 'little':
+            self.close()
+            raise ValueError("mapped hash tables can only be opened on little endian hosts")
+        self._slots = memoryview(self._map)[_HEADER.size:_HEADER.size + _SLOT_SIZE * capacity].cast('Q')
+
+    def __enter__(self) -> 'MappedHashMap':
+        """Support with-statements; the file is unmapped on exit."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Unmap the file at the end of a with-statement."""
+        self.close()
+
+    def close(self) -> None:
+        """
+        Unmap the file. The map cannot be used afterwards.
+        """
+        if getattr(self, '_slots', None) is not None:
+            self._slots.release()
+            self._slots = None
+        self._map.close()
+        self._file.close()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def _hash_key(self, key: str) -> int:
+        """
+        Return the hash the table stores for key, mixed in power_of_two mode
+        """
+        if self._power_of_two:
+            return mix_hash(self._hash_function(key))
+        return self._hash_function(key)
+
+    def _find(self, key: str) -> int:
+        """
+        Helper that probes the mapped slots for key. Returns the offset of the key's
+        blob, or 0 if the key is not in the table.
+        """
+        hash = self._hash_key(key)
+        capacity = self._capacity
+        home = hash & (capacity - 1) if self._power_of_two else hash % capacity
+        stored = hash & _MASK64
+        slots, data = self._slots, self._map
+        encoded = None
+
+        for index in self._probe_sequence(home, hash, capacity):
+            offset = slots[2 * index + 1]
+            if offset == 0:
+                return 0
+            if slots[2 * index] == stored:
+                if encoded is None:
+                    encoded = key.encode('utf-8')
+                key_length = _BLOB.unpack_from(data, offset)[0]
+                start = offset + _BLOB.size
+                if key_length == len(encoded) and data[start:start + key_length] == encoded:
+                    return offset
+
+        return 0
+
+    def _value_at(self, offset: int) -> object:
+        """
+        Helper that unpickles the value of the blob at offset
+        """
+        key_length, value_length = _BLOB.unpack_from(self._map, offset)
+        start = offset + _BLOB.size + key_length
+        return pickle.loads(self._map[start:start + value_length])
+
+    def get(self, key: str) -> object:
+        """
+        Method that returns the value associated with the given key, or None if the
+        key is not in the table.
+        """
+        offset = self._find(key)
+        if offset:
+            return self._value_at(offset)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method that returns True if the key is in the table, otherwise False.
+        """
+        return self._find(key) != 0
+
+    def items(self):
+        """
+        Method that returns a generator over (key, value) tuples, in slot order.
+        """
+        for index in range(self._capacity):
+            offset = self._slots[2 * index + 1]
+            if offset:
+                key_length = _BLOB.unpack_from(self._map, offset)[0]
+                start = offset + _BLOB.size
+                yield self._map[start:start + key_length].decode('utf-8'), self._value_at(offset)
+
+    def keys(self):
+        """
+        Method that returns a generator over the keys, in slot order.
+        """
+        for key, value in self.items():
+            yield key
+
+    def to_hash_map(self, **options) -> HashMap:
+        """
+        Method that loads every entry into a new in-memory open addressing HashMap,
+        presized for the whole table. options are passed to the HashMap constructor.
+        """
+        name = next(name for name, function in HASH_FUNCTIONS.items() if function is self._hash_function)
+        hash_map = HashMap(self._capacity, name, power_of_two=self._power_of_two, **options)
+        for key, value in self.items():
+            hash_map.put(key, value)
+        return hash_map
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    count = 50000
+    keys = ['key' + str(i) for i in range(count)]
+
+    print("\nMapped table - correctness")
+    print("--------------------------")
+    m = HashMap(11, 'fnv1a')
+    for i in range(count):
+        m.put(keys[i], {'id': i})
+    for i in range(0, count, 3):
+        m.remove(keys[i])
+
+    path = os.path.join(tempfile.mkdtemp(), 'table.a6oa')
+    write_mapped_table(m, path)
+    with MappedHashMap(path) as mapped:
+        result = mapped.get_size() == m.get_size()
+        for i in range(count):
+            result &= mapped.get(keys[i]) == m.get(keys[i])
+        result &= mapped.get('missing') is None
+        result &= sorted(mapped.keys()) == sorted(m.keys())
+        print(mapped.get_size(), mapped.get_capacity(), result)
+
+    print("\nMapped table - startup")
+    print("----------------------")
+    start = time.perf_counter()
+    m = HashMap(11, 'fnv1a')
+    for i in range(count):
+        m.put(keys[i], i)
+    rebuild = time.perf_counter() - start
+
+    write_mapped_table(m, path)
+    print(f"{'rebuild with put()':>24} {rebuild * 1000:>10.1f} ms")
+    print(f"{'file size':>24} {os.path.getsize(path) / 1024:>10.0f} KiB")
+
+    start = time.perf_counter()
+    mapped = MappedHashMap(path)
+    mapped.get(keys[0])
+    print(f"{'open + first get()':>24} {(time.perf_counter() - start) * 1000:>10.3f} ms")
+
+    for name, table in (('in-memory get()', m), ('mapped get()', mapped)):
+        start = time.perf_counter()
+        for key in keys:
+            table.get(key)
+        print(f"{name:>24} {count / (time.perf_counter() - start):>10.0f} ops/s")
+
+    mapped.close()
+    os.remove(path)
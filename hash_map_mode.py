@@ -0,0 +1,461 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Streaming find_mode. FrequencyCounter counts keys in a growing separate
+#           chaining HashMap while remembering the order keys first appeared in, so modes
+#           and top-k ties come out in the same order find_mode() reports them. count_stream()
+#           consumes any iterable in chunks, optionally sharding the keys by CRC-32 over worker
+#           processes that each own the counts of their keys, so the parent only merges the
+#           finished shards once. For streams with too many distinct
+#           keys to count exactly, MisraGries and CountMinSketch estimate the heavy hitters in
+#           memory fixed up front.
+
+
+from array import array
+import heapq
+import itertools
+import math
+from multiprocessing import Pipe, Process
+import os
+import random
+import time
+import zlib
+
+from a6_include import DynamicArray, get_hash_function, mix_hash
+from hash_map_sc import HashMap, find_mode
+
+
+class FrequencyCounter:
+    """
+    Exact key counts held in a separate chaining HashMap that grows with the number
+    of distinct keys. Keys are reported in the order they were first added.
+    """
+
+    def __init__(self, function='fnv1a') -> None:
+        """
+        Initialize an empty counter whose map uses the hash function function.
+        """
+        self._counts = HashMap(11, function, max_load_factor=1.0)
+        self._order = DynamicArray()
+        self._total = 0
+
+    def add(self, key: str, count: int = 1) -> None:
+        """
+        Method that adds count occurrences of key.
+        """
+        previous = self._counts.put_if_absent(key, count)
+        if previous is None:
+            self._order.append(key)
+        else:
+            self._counts.put(key, previous + count)
+        self._total += count
+
+    def update(self, keys) -> None:
+        """
+        Method that adds one occurrence of every key in the iterable keys.
+        """
+        for key in keys:
+            self.add(key)
+
+    def merge(self, pairs) -> None:
+        """
+        Method that adds the counts of an iterable of (key, count) tuples, such as the
+        items() of another counter.
+        """
+        for key, count in pairs:
+            self.add(key, count)
+
+    def get(self, key: str) -> int:
+        """
+        Return how often key was added, 0 if never
+        """
+        return self._counts.get(key) or 0
+
+    def get_size(self) -> int:
+        """
+        Return the number of distinct keys
+        """
+        return self._order.length()
+
+    def total(self) -> int:
+        """
+        Return the number of keys added, counting repeats
+        """
+        return self._total
+
+    def items(self):
+        """
+        Method that returns a generator over (key, count) tuples in order of first appearance.
+        """
+        for ele in range(self._order.length()):
+            key = self._order.get_at_index(ele)
+            yield key, self._counts.get(key)
+
+    def mode(self) -> (DynamicArray, int):
+        """
+        Method that returns the same (DynamicArray of modes, frequency) tuple as
+        find_mode(), with the modes in order of first appearance.
+        """
+        array = DynamicArray()
+        mode = None
+        for key, count in self.items():
+            if mode is None or count > mode:
+                array = DynamicArray()
+                mode = count
+                array.append(key)
+            elif count == mode:
+                array.append(key)
+        return (array, mode)
+
+    def top_k(self, k: int) -> DynamicArray:
+        """
+        Method that returns a DynamicArray of the k most frequent (key, count) tuples,
+        most frequent first, ties in order of first appearance.
+        """
+        return _top(self.items(), k)
+
+
+def _top(pairs, k: int) -> DynamicArray:
+    """
+    Helper that returns the k (key, count) tuples of pairs with the highest counts,
+    keeping the order of pairs among equal counts. Uses a bounded heap of k items
+    so picking costs O(n log k) and O(k) memory.
+    """
+    # the position breaks ties in favour of the earlier pair and keeps keys out of the comparison
+    best = heapq.nlargest(k, ((count, -ele, key) for ele, (key, count) in enumerate(pairs)))
+    return DynamicArray([(key, count) for count, position, key in best])
+
+
+def _chunks(iterable, chunk_size: int):
+    """
+    Helper that yields lists of up to chunk_size items from iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _count_shard(connection, function) -> None:
+    """
+    Worker process loop for count_stream(). Counts the keys of every (keys,
+    positions) part it receives until it receives None, then sends back a list of
+    (first position, key, count) tuples in order of first appearance.
+    """
+    counts = HashMap(11, function, max_load_factor=1.0)
+    firsts = []
+    while True:
+        part = connection.recv()
+        if part is None:
+            break
+        keys, positions = part
+        for ele in range(len(keys)):
+            key = keys[ele]
+            count = counts.put_if_absent(key, 1)
+            if count is None:
+                firsts.append((positions[ele], key))
+            else:
+                counts.put(key, count + 1)
+
+    connection.send([(position, key, counts.get(key)) for position, key in firsts])
+    connection.close()
+
+
+def count_stream(iterable, chunk_size: int = 1 << 16, workers: int = 1,
+                 function='fnv1a') -> FrequencyCounter:
+    """
+    Count the keys of any iterable, reading it chunk_size keys at a time so only one
+    chunk of the input is held at once. Serial by default. With more than one worker
+    (None means one per CPU) each key is sent, with its position in the stream, to
+    the worker process owning it by CRC-32, so every key is counted in one place and
+    the parent merges each distinct key once, at the end. The parent still
+    partitions every key, about a tenth of the cost of counting it, and pickles it
+    to a worker, so workers only pay off when each runs on a CPU of its own; on a
+    single CPU the serial count is faster. Keys must be strings. Returns a
+    FrequencyCounter.
+    """
+    counter = FrequencyCounter(function)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in _chunks(iterable, chunk_size):
+            counter.update(chunk)
+        return counter
+
+    connections, processes = [], []
+    for _ in range(workers):
+        client, worker = Pipe()
+        process = Process(target=_count_shard, args=(worker, function), daemon=True)
+        process.start()
+        worker.close()
+        connections.append(client)
+        processes.append(process)
+
+    try:
+        position = 0
+        for chunk in _chunks(iterable, chunk_size):
+            parts = [([], []) for _ in range(workers)]
+            for key in chunk:
+                keys, positions = parts[zlib.crc32(key.encode('utf-8')) % workers]
+                keys.append(key)
+                positions.append(position)
+                position += 1
+            for connection, part in zip(connections, parts):
+                connection.send(part)
+
+        for connection in connections:
+            connection.send(None)
+        shards = [connection.recv() for connection in connections]
+    finally:
+        for connection in connections:
+            connection.close()
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+    # each shard is in stream order already; positions are unique, so keys are never compared
+    for position, key, count in heapq.merge(*shards):
+        counter.add(key, count)
+    return counter
+
+
+def find_mode_stream(iterable, chunk_size: int = 1 << 16, workers: int = 1) -> (DynamicArray, int):
+    """
+    find_mode() for any iterable of keys, counted by count_stream(). Returns the same
+    (DynamicArray of modes, frequency) tuple, modes in order of first appearance.
+    """
+    return count_stream(iterable, chunk_size, workers).mode()
+
+
+def top_k(iterable, k: int, chunk_size: int = 1 << 16, workers: int = 1) -> DynamicArray:
+    """
+    Return a DynamicArray of the k most frequent (key, count) tuples of iterable,
+    counted exactly by count_stream(), most frequent first.
+    """
+    return count_stream(iterable, chunk_size, workers).top_k(k)
+
+
+# ------------- Approximate heavy hitters ------------- #
+
+class MisraGries:
+    """
+    Misra-Gries frequent items summary holding at most counters keys. After n keys
+    every key occurring more than n / (counters + 1) times is held, and each held
+    count is below the true count by at most n / (counters + 1).
+    """
+
+    def __init__(self, counters: int, function='fnv1a') -> None:
+        """
+        Initialize an empty summary of counters counters.
+        """
+        if counters < 1:
+            raise ValueError("counters must be at least 1")
+        self._limit = counters
+        self._counts = HashMap(11, function, expected_size=counters + 1)
+        self._total = 0
+
+    def add(self, key: str) -> None:
+        """
+        Method that counts one occurrence of key. When key is new and every counter
+        is taken, all counters are decremented instead and the ones reaching zero
+        are dropped; each of those decrements pays for an earlier increment, so
+        add() is O(1) amortized.
+        """
+        self._total += 1
+        count = self._counts.put_if_absent(key, 1)
+        if count is not None:
+            self._counts.put(key, count + 1)
+            return
+        if self._counts.get_size() <= self._limit:
+            return
+
+        for held, count in list(self._counts.items()):
+            if count == 1:
+                self._counts.remove(held)
+            else:
+                self._counts.put(held, count - 1)
+
+    def update(self, keys) -> None:
+        """
+        Method that counts every key in the iterable keys.
+        """
+        for key in keys:
+            self.add(key)
+
+    def estimate(self, key: str) -> int:
+        """
+        Return the lower bound on the count of key, 0 if it is not held
+        """
+        return self._counts.get(key) or 0
+
+    def error(self) -> float:
+        """
+        Return the most any estimate can be below the true count
+        """
+        return self._total / (self._limit + 1)
+
+    def top_k(self, k: int) -> DynamicArray:
+        """
+        Method that returns a DynamicArray of the k held (key, estimate) tuples with
+        the highest estimates, highest first.
+        """
+        return _top(self._counts.items(), k)
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch of depth rows of width counters. estimate() never undercounts
+    and, with probability 1 - e ** -depth, overcounts by at most e / width of the
+    keys added. The sketch keeps the keys of the k highest estimates seen so far as
+    heavy hitter candidates.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, k: int = 10, function='fnv1a') -> None:
+        """
+        Initialize an empty sketch tracking k heavy hitter candidates.
+        """
+        if width < 1 or depth < 1 or k < 1:
+            raise ValueError("width, depth and k must be at least 1")
+        self._width = width
+        self._depth = depth
+        self._rows = [array('q', bytes(8 * width)) for _ in range(depth)]
+        self._hash_function = get_hash_function(function)
+        self._k = k
+        self._candidates = HashMap(11, function, expected_size=k + 1)
+        self._floor = 0
+        self._total = 0
+
+    def _columns(self, key: str) -> list:
+        """
+        Helper that returns the counter column of key in every row, derived from one
+        mixed 64 bit hash by double hashing (h1 + row * h2).
+        """
+        hash = mix_hash(self._hash_function(key))
+        first, step = hash & 0xFFFFFFFF, (hash >> 32) | 1
+        return [(first + row * step) % self._width for row in range(self._depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Method that adds count occurrences of key and returns its new estimate. A key
+        whose estimate beats the lowest candidate replaces it.
+        """
+        self._total += count
+        estimate = None
+        for row, column in zip(self._rows, self._columns(key)):
+            row[column] += count
+            if estimate is None or row[column] < estimate:
+                estimate = row[column]
+
+        if self._candidates.contains_key(key):
+            self._candidates.put(key, estimate)
+        elif self._candidates.get_size() < self._k:
+            self._candidates.put(key, estimate)
+        elif estimate > self._floor:
+            # the floor lags behind candidates that grew since, so find the real lowest first
+            lowest = min(self._candidates.items(), key=lambda item: item[1])
+            if estimate > lowest[1]:
+                self._candidates.remove(lowest[0])
+                self._candidates.put(key, estimate)
+                lowest = min(self._candidates.items(), key=lambda item: item[1])
+            self._floor = lowest[1]
+        return estimate
+
+    def update(self, keys) -> None:
+        """
+        Method that adds one occurrence of every key in the iterable keys.
+        """
+        for key in keys:
+            self.add(key)
+
+    def estimate(self, key: str) -> int:
+        """
+        Return the upper bound on the count of key
+        """
+        return min(row[column] for row, column in zip(self._rows, self._columns(key)))
+
+    def error(self) -> float:
+        """
+        Return the most an estimate overcounts with probability 1 - e ** -depth
+        """
+        return math.e * self._total / self._width
+
+    def top_k(self, k: int) -> DynamicArray:
+        """
+        Method that returns a DynamicArray of the k candidate (key, estimate) tuples
+        with the highest estimates, highest first. k should not exceed the k the
+        sketch was built with.
+        """
+        return _top(self._candidates.items(), k)
+
+
+def approximate_top_k(iterable, k: int, method: str = 'misra_gries', **options) -> DynamicArray:
+    """
+    Return a DynamicArray of estimated (key, count) tuples for the k most frequent
+    keys of iterable in one pass and memory independent of the number of distinct
+    keys. method 'misra_gries' undercounts and uses options['counters'] counters
+    (default 10 * k); 'count_min' overcounts and passes options on to CountMinSketch.
+    """
+    if method == 'misra_gries':
+        summary = MisraGries(options.pop('counters', 10 * k), **options)
+    elif method == 'count_min':
+        summary = CountMinSketch(k=k, **options)
+    else:
+        raise ValueError(f"unknown method {method!r}, use 'misra_gries' or 'count_min'")
+    summary.update(iterable)
+    return summary.top_k(k)
+
+
+def mode_benchmark(count: int = 200000, distinct: int = 20000, worker_counts=(1, 2, 4)) -> list:
+    """
+    Time find_mode(), find_mode_stream() for each worker count and the approximate
+    summaries on count Zipf distributed keys drawn from distinct keys. Returns a list
+    of (name, seconds, result).
+    """
+    generator = random.Random(261)
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    keys = generator.choices(['key' + str(i) for i in range(distinct)], weights, k=count)
+    results = []
+
+    def run(name: str, call) -> None:
+        start = time.perf_counter()
+        result = call()
+        results.append((name, time.perf_counter() - start, result))
+
+    run('find_mode', lambda: find_mode(DynamicArray(keys))[1])
+    for workers in worker_counts:
+        run(f'stream x{workers}', lambda: find_mode_stream(iter(keys), 1 << 14, workers)[1])
+    run('misra_gries', lambda: approximate_top_k(iter(keys), 1, counters=100)[0])
+    run('count_min', lambda: approximate_top_k(iter(keys), 1, 'count_min', width=1024)[0])
+    return results
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nfind_mode_stream - matches find_mode")
+    print("------------------------------------")
+    test_cases = (
+        ["Arch", "Manjaro", "Manjaro", "Mint", "Mint", "Mint", "Ubuntu", "Ubuntu", "Ubuntu"],
+        ["one", "two", "three", "four", "five"],
+        ["2", "4", "2", "6", "8", "4", "1", "3", "4", "5", "7", "3", "3", "2"],
+    )
+    for case in test_cases:
+        expected = find_mode(DynamicArray(case))
+        for workers in (1, 2):
+            mode, frequency = find_mode_stream(iter(case), chunk_size=4, workers=workers)
+            print(list(mode) == list(expected[0]) and frequency == expected[1], mode, frequency)
+
+    print("\ntop_k")
+    print("-----")
+    words = "the quick brown fox jumps over the lazy dog the fox the end".split()
+    print(top_k(words, 3))
+    print(approximate_top_k(words, 2, counters=4))
+    print(approximate_top_k(words, 2, 'count_min', width=64, depth=3))
+
+    print("\nMode - 200000 Zipf keys, 20000 distinct")
+    print("---------------------------------------")
+    print(f"{'method':>12} {'seconds':>9} result")
+    for name, seconds, result in mode_benchmark():
+        print(f"{name:>12} {seconds:>9.3f} {result}")
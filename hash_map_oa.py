@@ -8,26 +8,77 @@
 #           table_load(), and get_keys()
 
 
-from a6_include import (DynamicArray, HashEntry,
-                        hash_function_1, hash_function_2)
+from a6_include import (DistributionReport, DynamicArray, HashEntry, HashMapView,
+                        Instrumentation, PROBE_SEQUENCES, bucket_indices, get_hash_function,
+                        hash_function_1, hash_function_2, hash_batch, is_prime, mix_hash,
+                        next_power_of_two, next_prime)
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function, compaction_threshold: float = 0.5,
+                 incremental_resize: bool = False, migration_step: int = 8,
+                 robin_hood: bool = False, probing: str = 'quadratic',
+                 power_of_two: bool = False) -> None:
         """
         Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        quadratic probing for collision resolution, or Robin Hood linear
+        probing with backward shift deletion when robin_hood is True.
+        probing picks another probe sequence from PROBE_SEQUENCES: 'linear',
+        'quadratic' or 'double_hash'. It is ignored in Robin Hood mode.
+        compaction_threshold is the share of slots holding live entries or
+        tombstones at which put() rebuilds the table to drop the tombstones, once
+        tombstones make up a quarter of those slots; at half full any tombstone
+        triggers it. It never rebuilds a table without tombstones, so a low
+        threshold does not lower the load factor the table grows at.
+        With incremental_resize the automatic grow/compact rebuilds keep the old
+        bucket array around and every put/get/remove moves migration_step of its
+        slots into the new array, instead of rehashing everything in one put().
+        With power_of_two the capacity is a power of two instead of a prime and
+        buckets are picked by masking the hash after an avalanche mixing step.
+        function is a hash function or the name of one in HASH_FUNCTIONS.
         """
+        if not 0 < compaction_threshold <= 0.5:
+            raise ValueError("compaction_threshold must be in (0, 0.5]")
+        if migration_step < 1:
+            raise ValueError("migration_step must be at least 1")
+        if probing not in PROBE_SEQUENCES:
+            raise ValueError(f"probing must be one of {', '.join(PROBE_SEQUENCES)}")
+
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number, or a power of two in power_of_two mode
+        self._power_of_two = power_of_two
+        self._capacity = next_power_of_two(capacity) if power_of_two else self._next_prime(capacity)
         for _ in range(self._capacity):
             self._buckets.append(None)
 
-        self._hash_function = function
+        self._hash_function = get_hash_function(function)
         self._size = 0
+        self._tombstones = 0
+        self._compaction_threshold = compaction_threshold
+
+        # bucket array being drained by an incremental resize, None when idle
+        self._incremental_resize = incremental_resize
+        self._migration_step = migration_step
+        self._old_buckets = None
+        self._old_tombstones = 0
+        self._migrate_index = 0
+
+        self._robin_hood = robin_hood
+        # the name is kept since instrumentation replaces the sequence with a counting wrapper
+        self._probing = probing
+        self._probe_sequence = PROBE_SEQUENCES[probing]
+
+        # operation counters, None unless enable_instrumentation() was called
+        self._instrumentation = None
+
+        # bumped by every insert, removal and resize so iterators can spot changes
+        self._modifications = 0
+
+        # view returned by snapshot() until the next write, and the ids of the entries
+        # copied since it was taken; None when no snapshot shares the entries
+        self._snapshot = None
+        self._owned = None
 
     def __str__(self) -> str:
         """
@@ -41,36 +92,17 @@ class HashMap:
 
     def _next_prime(self, capacity: int) -> int:
         """
-        Increment from given number to find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Increment from given number to find the closest prime number, using the
+        GROWTH_PRIMES table and a Miller-Rabin test instead of trial division
         """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity == 2 or capacity == 3:
-            return True
-
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
-
-        return True
+        return is_prime(capacity)
 
     def get_size(self) -> int:
         """
@@ -86,6 +118,104 @@ class HashMap:
         """
         return self._capacity
 
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Return the capacity resize_table() uses for a requested capacity: the
+        next power of two in power_of_two mode, else the next prime
+        """
+        if self._power_of_two:
+            return next_power_of_two(capacity)
+        if self._is_prime(capacity):
+            return capacity
+        return self._next_prime(capacity)
+
+    def _hash_key(self, key: str) -> int:
+        """
+        Return the hash the table stores for key, mixed in power_of_two mode
+        """
+        if self._power_of_two:
+            return mix_hash(self._hash_function(key))
+        return self._hash_function(key)
+
+    def _hash_keys(self, keys: list) -> DynamicArray:
+        """
+        Batch version of _hash_key()
+        """
+        hashes = hash_batch(self._hash_function, keys)
+        if self._power_of_two:
+            for ele in range(hashes.length()):
+                hashes[ele] = mix_hash(hashes[ele])
+        return hashes
+
+    def _home(self, hash: int, length: int) -> int:
+        """
+        Return the home bucket of a stored hash in a bucket array of the given length
+        """
+        if self._power_of_two:
+            return hash & (length - 1)
+        return hash % length
+
+    def get_tombstones(self) -> int:
+        """
+        Return number of tombstones currently in the table, including the
+        bucket array still being migrated by an incremental resize
+        """
+        return self._tombstones + self._old_tombstones
+
+    def is_migrating(self) -> bool:
+        """
+        Return True while an incremental resize is still moving entries
+        """
+        return self._old_buckets is not None
+
+    def enable_instrumentation(self) -> Instrumentation:
+        """
+        Start counting operations, probes, collisions and resizes on this map and
+        return the Instrumentation holding the counters. Maps that never enable it
+        run the plain methods with no counting overhead.
+        """
+        if self._instrumentation is None:
+            stats = Instrumentation()
+            stats.install_operations(self)
+            if self._incremental_resize:
+                # incremental grow/compact rebuilds never go through resize_table()
+                stats.install(self, '_rebuild', stats.time_resizes(self._rebuild))
+            if self._robin_hood:
+                stats.install(self, '_robin_hood_scan', self._counted_robin_hood_scan(stats))
+            else:
+                stats.install(self, '_probe_sequence', stats.count_probes(self._probe_sequence))
+            self._instrumentation = stats
+        return self._instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """
+        Stop counting and go back to the plain methods
+        """
+        if self._instrumentation is not None:
+            self._instrumentation.uninstall(self)
+            self._instrumentation = None
+
+    def get_instrumentation(self) -> Instrumentation:
+        """
+        Return the Instrumentation of this map, or None while it is disabled
+        """
+        return self._instrumentation
+
+    def _counted_robin_hood_scan(self, stats: Instrumentation) -> callable:
+        """
+        Helper that wraps _robin_hood_scan() to count the buckets each scan examines
+        """
+        scan, counters = self._robin_hood_scan, stats.counters
+
+        def counted(buckets, key, hash):
+            index, distance, found = scan(buckets, key, hash)
+            counters['probes'] += min(distance + 1, buckets.length())
+            if distance > 0:
+                counters['collisions'] += 1
+            return index, distance, found
+
+        return counted
+
     # ------------------------------------------------------------------ #
 
     def put(self, key: str, value: object) -> None:
@@ -95,28 +225,337 @@ class HashMap:
         quadratic probing sequence to determine next available index. Returns None.
         """
 
+        self._put_entry(key, value, self._hash_key(key))
+
+    def upsert(self, key: str, value: object) -> object:
+        """
+        Method that stores value under key like put(), and returns the value the key
+        held before, or None if the key was new.
+        """
+        return self._put_entry(key, value, self._hash_key(key))
+
+    def put_if_absent(self, key: str, value: object) -> object:
+        """
+        Method that stores value under key only if the key is not in the hash map yet.
+        Returns the value already stored for the key, or None if value was added.
+        """
+        hash = self._hash_key(key)
+        entry = self._find_entry(self._buckets, key, hash)
+        if entry is None and self._old_buckets is not None:
+            entry = self._find_entry(self._old_buckets, key, hash)
+        if entry is not None:
+            return entry.value
+
+        self._put_entry(key, value, hash)
+
+    def _put_entry(self, key: str, value: object, hash: int) -> object:
+        """
+        Helper for put() that takes an already computed hash for the key. Grows the
+        table when the load factor reaches 0.5, or compacts it when its tombstones
+        call for it (see _needs_compaction()), before storing the entry. Returns the
+        value the key held before, or None.
+        """
+        self._migrate(self._migration_step)
+
         if self.table_load() >= 0.5:
-            self.resize_table((self._capacity)*2)
+            self._rebuild((self._capacity)*2)
+        elif self._needs_compaction(self._size, self._tombstones, self._capacity):
+            self._compact()
+
+        if self._old_buckets is not None:
+            # the key must only live in one array, so drop any copy not yet migrated
+            index = self._find_index(self._old_buckets, key, hash)
+            if index != -1:
+                entry = self._writable_entry(self._old_buckets, index)
+                entry.is_tombstone = True
+                self._old_tombstones += 1
+                self._size -= 1
+                self._put_hashed(key, value, hash)
+                return entry.value
 
-        entry = HashEntry(key, value)
-        hash = self._hash_function(key)
-        index = hash % self._buckets.length()
-        initial_index = index
-        probe = 1
+        return self._put_hashed(key, value, hash)
 
-        if self._buckets.get_at_index(index) is None:
-            self._buckets.set_at_index(index, entry)
+    def _needs_compaction(self, size: int, tombstones: int, capacity: int) -> bool:
+        """
+        Helper that returns True if a table of capacity slots holding size live entries
+        and tombstones tombstones should be rebuilt to drop them: when the occupied
+        slots reach half the table, or reach the compaction threshold with tombstones
+        making up at least a quarter of them. A table without tombstones never is.
+        """
+        occupied = size + tombstones
+        if tombstones == 0:
+            return False
+        return occupied / capacity >= 0.5 or (occupied / capacity >= self._compaction_threshold
+                                              and 4 * tombstones >= occupied)
+
+    def _compact(self) -> None:
+        """
+        Helper that rebuilds the table to drop its tombstones. Keeps the capacity when
+        the live entries alone fill less than half the threshold, otherwise doubles it
+        so that back to back compactions cannot happen.
+        """
+        if self.table_load() < self._compaction_threshold / 2:
+            self._rebuild(self._capacity)
         else:
-            while self._buckets.get_at_index(index) is not None and not self._buckets.get_at_index(index).is_tombstone:
-                if entry.key == self._buckets.get_at_index(index).key:
-                    self._buckets.set_at_index(index, entry)
-                    return
-                index = (initial_index + probe**2) % self._buckets.length()
-                probe += 1
+            self._rebuild((self._capacity)*2)
+
+    def _rebuild(self, new_capacity: int) -> None:
+        """
+        Helper for the automatic grow/compact rebuilds. Calls resize_table() directly,
+        or in incremental mode swaps in an empty bucket array and leaves the old one to
+        be drained by _migrate().
+        """
+        if not self._incremental_resize:
+            self.resize_table(new_capacity)
+            return
+
+        # a rebuild cannot start while the previous one is still draining
+        self._migrate(self._old_buckets.length() if self._old_buckets is not None else 0)
+
+        capacity = self._round_capacity(new_capacity)
+
+        self._old_buckets = self._buckets
+        self._old_tombstones = self._tombstones
+        self._migrate_index = 0
+
+        self._buckets = DynamicArray([None] * capacity)
+        self._capacity = capacity
+        self._tombstones = 0
+        self._modifications += 1
+
+    def _migrate(self, slots: int) -> None:
+        """
+        Helper that moves the live entries of up to slots buckets from the array being
+        drained into the current one. Moved entries are left behind as tombstones so the
+        probe chains of the entries that have not moved yet stay intact.
+        """
+        old_array = self._old_buckets
+        if old_array is None:
+            return
+
+        end = min(self._migrate_index + slots, old_array.length())
+        for ele in range(self._migrate_index, end):
+            entry = old_array.get_at_index(ele)
+            if entry is not None and not entry.is_tombstone:
+                self._writable_entry(old_array, ele).is_tombstone = True
+                self._size -= 1
+                self._put_hashed(entry.key, entry.value, entry.hash)
+        self._migrate_index = end
+
+        if end == old_array.length():
+            self._old_buckets = None
+            self._old_tombstones = 0
+            self._migrate_index = 0
+
+    def _own_entry(self, entry: HashEntry) -> HashEntry:
+        """
+        Helper that returns entry if it may be written to, or a copy of it while a
+        snapshot shares it. The caller puts the copy into a bucket.
+        """
+        if self._owned is None or id(entry) in self._owned:
+            return entry
+        entry = entry.copy()
+        self._owned.add(id(entry))
+        return entry
+
+    def _writable_entry(self, buckets: DynamicArray, index: int) -> HashEntry:
+        """
+        Helper that returns the entry at index of buckets for a write, copied first
+        while a snapshot shares it so the snapshot keeps the old one.
+        """
+        entry = self._own_entry(buckets.get_at_index(index))
+        buckets.set_at_index(index, entry)
+        return entry
+
+    def _find_entry(self, buckets: DynamicArray, key: str, hash: int) -> HashEntry:
+        """
+        Helper that probes buckets for a live entry with the given key. Returns the
+        entry or None.
+        """
+        index = self._find_index(buckets, key, hash)
+        if index != -1:
+            return buckets.get_at_index(index)
+
+    def _find_index(self, buckets: DynamicArray, key: str, hash: int) -> int:
+        """
+        Helper that probes buckets for a live entry with the given key. Probes past
+        tombstones and stops at the first empty bucket. Returns the index of the
+        entry or -1.
+        """
+        if self._robin_hood:
+            return self._robin_hood_find_index(buckets, key, hash)
+
+        length = buckets.length()
+        for index in self._probe_sequence(self._home(hash, length), hash, length):
+            entry = buckets.get_at_index(index)
+            if entry is None:
+                return -1
+            if not entry.is_tombstone and hash == entry.hash and key == entry.key:
+                return index
+
+        return -1
 
+    def _robin_hood_find_index(self, buckets: DynamicArray, key: str, hash: int) -> int:
+        """
+        Robin Hood version of _find_index(). Probes linearly and gives up as soon as
+        it reaches an entry closer to its home bucket than the key would be, since
+        insertion would have displaced that entry. Returns the index or -1.
+        """
+        index, distance, found = self._robin_hood_scan(buckets, key, hash)
+        return index if found else -1
+
+    def _robin_hood_scan(self, buckets: DynamicArray, key: str, hash: int) -> (int, int, bool):
+        """
+        Helper that walks linearly from the home bucket of hash until it finds the key,
+        an empty bucket or an entry closer to its home than the key would be. Returns
+        (index, distance from home, whether the key was found).
+        """
+        length = buckets.length()
+        index = self._home(hash, length)
+        distance = 0
+
+        while distance < length:
+            entry = buckets.get_at_index(index)
+            if entry is None or entry.distance < distance:
+                break
+            if not entry.is_tombstone and hash == entry.hash and key == entry.key:
+                return index, distance, True
+            index = (index + 1) % length
+            distance += 1
+
+        return index, distance, False
+
+    def _robin_hood_put_hashed(self, key: str, value: object, hash: int) -> object:
+        """
+        Robin Hood version of _put_hashed(). Updates the key if present, otherwise
+        walks the new entry forward and swaps it with any entry that sits closer to
+        its home bucket, carrying the displaced entry on until an empty bucket.
+        """
+        length = self._buckets.length()
+        index, distance, found = self._robin_hood_scan(self._buckets, key, hash)
+        if found:
+            entry = self._writable_entry(self._buckets, index)
+            previous, entry.value = entry.value, value
+            self._snapshot = None
+            return previous
+
+        entry = HashEntry(key, value, hash)
+        entry.distance = distance
+        while entry is not None:
+            displaced = self._buckets.get_at_index(index)
             self._buckets.set_at_index(index, entry)
+            entry = displaced
+            if entry is not None:
+                entry = self._own_entry(entry)
+                entry.distance += 1
+            index = (index + 1) % length
 
         self._size += 1
+        self._modifications += 1
+        self._snapshot = None
+
+    def _backward_shift(self, index: int) -> None:
+        """
+        Helper that deletes the entry at index without a tombstone by shifting the
+        following displaced entries one bucket back towards home.
+        """
+        length = self._buckets.length()
+        next_index = (index + 1) % length
+
+        while self._buckets.get_at_index(next_index) is not None \
+                and self._buckets.get_at_index(next_index).distance > 0:
+            entry = self._own_entry(self._buckets.get_at_index(next_index))
+            entry.distance -= 1
+            self._buckets.set_at_index(index, entry)
+            index = next_index
+            next_index = (next_index + 1) % length
+
+        self._buckets.set_at_index(index, None)
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> object:
+        """
+        Helper for put() that takes an already computed hash for the key. Does not
+        check the load factor, callers are responsible for sizing the table first.
+        Probes past tombstones so an existing key is always updated, then reuses the
+        first tombstone on the probe path for a new key. Returns the previous value
+        of an updated key, or None.
+        """
+        if self._robin_hood:
+            return self._robin_hood_put_hashed(key, value, hash)
+
+        length = self._buckets.length()
+        free = None
+        empty = None
+
+        for index in self._probe_sequence(self._home(hash, length), hash, length):
+            entry = self._buckets.get_at_index(index)
+            if entry is None:
+                empty = index
+                break
+            if entry.is_tombstone:
+                if free is None:
+                    free = index
+            elif hash == entry.hash and key == entry.key:
+                entry = self._writable_entry(self._buckets, index)
+                previous, entry.value = entry.value, value
+                self._snapshot = None
+                return previous
+
+        if free is not None:
+            index = free
+            self._tombstones -= 1
+        elif empty is not None:
+            index = empty
+        else:
+            # the probe sequence ran out without reaching a free bucket
+            self.resize_table((self._capacity)*2)
+            return self._put_hashed(key, value, hash)
+
+        self._buckets.set_at_index(index, HashEntry(key, value, hash))
+        self._size += 1
+        self._modifications += 1
+        self._snapshot = None
+
+    def put_many(self, keys, values) -> None:
+        """
+        Method to put a batch of key:value pairs into the hash map. Takes a sequence of
+        keys and a sequence of values of the same length. Hashes the whole batch at once
+        and grows the table a single time to the capacity repeated put() calls would reach
+        (put() can refill tombstones that the batch estimate counts, so with tombstones
+        present the batch may compact where the put() loop would not). Returns None.
+        """
+        keys, values = list(keys), list(values)
+        if len(keys) != len(values):
+            raise ValueError("put_many() needs the same number of keys and values")
+        if not keys:
+            return
+
+        # _put_hashed() only sees the current array, so finish any pending migration
+        if self._old_buckets is not None:
+            self._migrate(self._old_buckets.length())
+
+        # replay the checks put() makes before storing each pair, growing or compacting
+        # once to the capacity the put() loop would end at; keys already in the map are
+        # updated in place and add nothing
+        hashes = self._hash_keys(keys)
+        batch = {keys[ele]: hashes[ele] for ele in range(len(keys))}
+        added = {key for key, hash in batch.items() if self._find_index(self._buckets, key, hash) == -1}
+        size, capacity, tombstones, rebuild = self._size, self._capacity, self._tombstones, False
+        for key in keys:
+            if size / capacity >= 0.5:
+                capacity, tombstones, rebuild = self._round_capacity(capacity * 2), 0, True
+            elif self._needs_compaction(size, tombstones, capacity):
+                if size / capacity >= self._compaction_threshold / 2:
+                    capacity = self._round_capacity(capacity * 2)
+                tombstones, rebuild = 0, True
+            if key in added:
+                added.remove(key)
+                size += 1
+        if rebuild:
+            self.resize_table(capacity)
+
+        for ele in range(len(keys)):
+            self._put_hashed(keys[ele], values[ele], hashes[ele])
 
     def table_load(self) -> float:
         """
@@ -128,6 +567,13 @@ class HashMap:
 
         return size / buckets
 
+    def table_occupancy(self) -> float:
+        """
+        Method to return the share of buckets holding either a live entry or a
+        tombstone. Takes no parameters and returns the occupancy.
+        """
+        return (self._size + self._tombstones) / self._buckets.length()
+
     def empty_buckets(self) -> int:
         """
         Method that takes no parameters. Iterates through the hash table and
@@ -145,17 +591,18 @@ class HashMap:
     def resize_table(self, new_capacity: int) -> None:
         """
         Method that resizes the hash table based on the capacity that is given as a parameter.
-        Rehashes all key:value pairs after the capacity resize. Ensures that the capacity is a prime
-        number. Returns None.
+        Rehashes all key:value pairs after the capacity resize using the hash cached in each entry
+        and drops every tombstone. Ensures that the capacity is a prime number (a power of two in
+        power_of_two mode). Returns None.
         """
         # remember to rehash non-deleted entries into new table
         if new_capacity < 1 or new_capacity < self._size:
             return
 
-        if self._is_prime(new_capacity):
-            capacity = new_capacity
-        else:
-            capacity = self._next_prime(new_capacity)
+        if self._old_buckets is not None:
+            self._migrate(self._old_buckets.length())
+
+        capacity = self._round_capacity(new_capacity)
 
         old_cap = self._capacity
         old_array = self._buckets
@@ -167,12 +614,82 @@ class HashMap:
             self._buckets.append(None)
 
         self._size = 0
+        self._tombstones = 0
+        self._modifications += 1
 
         for ele in range(old_cap):
-            if old_array.get_at_index(ele) is not None:
-                key = old_array.get_at_index(ele).key
-                value = old_array.get_at_index(ele).value
-                self.put(key,value)
+            if old_array.get_at_index(ele) is not None and not old_array.get_at_index(ele).is_tombstone:
+                entry = old_array.get_at_index(ele)
+                self._put_entry(entry.key, entry.value, entry.hash)
+
+        # every entry is a new object now, so none is shared with a snapshot
+        self._owned = None
+
+    def parallel_resize_table(self, new_capacity: int, workers: int = 1, pool=None) -> None:
+        """
+        Method that resizes the hash table like resize_table(), for very large tables.
+        The live entries and their cached hashes are collected in one pass, their home
+        buckets are computed by bucket_indices() (with NumPy, or, for tables of at
+        least PARALLEL_BUCKET_MIN entries, split over workers processes, None meaning
+        one per CPU, on pool if given; serial by default), and the entries are
+        scattered into the new table in a second pass, each probing from its home.
+        The capacity is doubled up front as often as resize_table() would grow it
+        while reinserting. Robin Hood tables skip the parallel step and reinsert
+        through the Robin Hood put, since displacement depends on the order of
+        insertion. A pending incremental resize is finished first; this one always
+        completes right away.
+        """
+        if new_capacity < 1 or new_capacity < self._size:
+            return
+
+        if self._old_buckets is not None:
+            self._migrate(self._old_buckets.length())
+
+        entries = [entry for entry in self._buckets if entry is not None and not entry.is_tombstone]
+        capacity = self._round_capacity(new_capacity)
+        while entries and (len(entries) - 1) / capacity >= 0.5:
+            capacity = self._round_capacity(capacity * 2)
+
+        self._buckets = DynamicArray([None] * capacity)
+        self._capacity = capacity
+        self._tombstones = 0
+        self._modifications += 1
+        self._snapshot = None
+        self._owned = None
+
+        self._size = 0
+        self._scatter([HashEntry(entry.key, entry.value, entry.hash) for entry in entries], workers, pool)
+
+    def _scatter(self, entries: list, workers: int = 1, pool=None) -> None:
+        """
+        Helper for parallel_resize_table() and snapshot restores that stores entries,
+        HashEntry objects with distinct keys and cached hashes, in the table, which
+        must hold no tombstones and have room for them all under half full. Home
+        buckets come from bucket_indices() and each entry takes the first free bucket
+        on its probe sequence, without comparing keys. Robin Hood tables insert
+        through the Robin Hood put instead.
+        """
+        if self._robin_hood:
+            for entry in entries:
+                self._robin_hood_put_hashed(entry.key, entry.value, entry.hash)
+            return
+
+        buckets = self._buckets
+        capacity = self._capacity
+        homes = bucket_indices([entry.hash for entry in entries], capacity, self._power_of_two, workers, pool)
+        for entry, home in zip(entries, homes):
+            # every probe sequence starts at the home bucket, which is usually free
+            if buckets.get_at_index(home) is None:
+                buckets.set_at_index(home, entry)
+                continue
+            for index in self._probe_sequence(home, entry.hash, capacity):
+                if buckets.get_at_index(index) is None:
+                    buckets.set_at_index(index, entry)
+                    break
+            else:
+                raise RuntimeError("probe sequence found no free slot")
+        self._size += len(entries)
+        self._modifications += 1
 
     def get(self, key: str) -> object:
         """
@@ -180,16 +697,35 @@ class HashMap:
         through the possible indexes until key mathes. If it is not in hash table,
         returns None else returns the value.
         """
-        hash = self._hash_function(key)
-        index = hash % self._buckets.length()
-        initial_index = index
-        probe = 1
+        return self._get_hashed(key, self._hash_key(key))
 
-        while self._buckets.get_at_index(index) is not None and not self._buckets.get_at_index(index).is_tombstone:
-            if key == self._buckets.get_at_index(index).key:
-                return self._buckets.get_at_index(index).value
-            index = (initial_index + probe ** 2) % self._buckets.length()
-            probe += 1
+    def _get_hashed(self, key: str, hash: int) -> object:
+        """
+        Helper for get() that takes an already computed hash for the key. Looks in the
+        array being migrated as well when an incremental resize is in progress.
+        """
+        self._migrate(self._migration_step)
+
+        entry = self._find_entry(self._buckets, key, hash)
+        if entry is None and self._old_buckets is not None:
+            entry = self._find_entry(self._old_buckets, key, hash)
+
+        if entry is not None:
+            return entry.value
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method that looks up a batch of keys. Hashes the whole batch at once and
+        returns a DynamicArray with the value (or None) for each key in order.
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+        array = DynamicArray()
+
+        for ele in range(len(keys)):
+            array.append(self._get_hashed(keys[ele], hashes[ele]))
+
+        return array
 
     def contains_key(self, key: str) -> bool:
         """
@@ -204,20 +740,48 @@ class HashMap:
     def remove(self, key: str) -> None:
         """
         Method that effictively removes a key:value from the hash table. If the value
-        is in the table it will set the hash entry tombstone to True. Returns None.
+        is in the table it will set the hash entry tombstone to True and stop probing.
+        Returns None.
         """
+        self._remove_hashed(key, self._hash_key(key))
 
-        hash = self._hash_function(key)
-        index = hash % self._buckets.length()
-        initial_index = index
-        probe = 1
-
-        while self._buckets.get_at_index(index) is not None:
-            if key == self._buckets.get_at_index(index).key and not self._buckets.get_at_index(index).is_tombstone:
-                self._buckets.get_at_index(index).is_tombstone = True
+    def _remove_hashed(self, key: str, hash: int) -> None:
+        """
+        Helper for remove() that takes an already computed hash for the key. Looks in the
+        array being migrated as well when an incremental resize is in progress.
+        """
+        self._migrate(self._migration_step)
+
+        index = self._find_index(self._buckets, key, hash)
+        if index != -1:
+            if self._robin_hood:
+                self._backward_shift(index)
+            else:
+                self._writable_entry(self._buckets, index).is_tombstone = True
+                self._tombstones += 1
+            self._size -= 1
+            self._modifications += 1
+            self._snapshot = None
+        elif self._old_buckets is not None:
+            # entries still waiting to migrate keep their slots, so tombstone them
+            index = self._find_index(self._old_buckets, key, hash)
+            if index != -1:
+                self._writable_entry(self._old_buckets, index).is_tombstone = True
+                self._old_tombstones += 1
                 self._size -= 1
-            index = (initial_index + probe ** 2) % self._buckets.length()
-            probe += 1
+                self._modifications += 1
+                self._snapshot = None
+
+    def remove_many(self, keys) -> None:
+        """
+        Method that removes a batch of keys from the hash table. Hashes the whole
+        batch at once, keys that are not present are ignored. Returns None.
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+
+        for ele in range(len(keys)):
+            self._remove_hashed(keys[ele], hashes[ele])
 
     def clear(self) -> None:
         """
@@ -227,16 +791,97 @@ class HashMap:
         """
         self._buckets = DynamicArray()
         self._size = 0
+        self._tombstones = 0
+        self._modifications += 1
+        self._snapshot = None
+        self._owned = None
+        self._old_buckets = None
+        self._old_tombstones = 0
+        self._migrate_index = 0
         for _ in range(self._capacity):
             self._buckets.append(None)
 
+    def probe_lengths(self) -> DynamicArray:
+        """
+        Method that takes no parameters. Returns a DynamicArray with, for every live
+        entry in the current bucket array, the number of buckets a successful get()
+        examines before reaching it.
+        """
+        array = DynamicArray()
+        length = self._buckets.length()
+
+        for ele in range(length):
+            entry = self._buckets.get_at_index(ele)
+            if entry is not None and not entry.is_tombstone:
+                array.append(self._probe_count(ele, entry, length))
+
+        return array
+
+    def _probe_count(self, slot: int, entry: HashEntry, length: int) -> int:
+        """
+        Helper that returns how many buckets a get() for entry, stored at slot in a
+        bucket array of the given length, examines before reaching it.
+        """
+        if self._robin_hood:
+            return entry.distance + 1
+        probes = 1
+        for index in self._probe_sequence(self._home(entry.hash, length), entry.hash, length):
+            if index == slot:
+                break
+            probes += 1
+        return probes
+
+    def analyze(self, top: int = 5) -> DistributionReport:
+        """
+        Method that measures how the keys are spread over the current bucket array in
+        one pass. Returns a DistributionReport with the probe length histogram of the
+        live entries, and the home buckets the most keys hash to. Entries an incremental
+        resize has not migrated yet are left out, as in probe_lengths().
+        """
+        length = self._buckets.length()
+        counts = [0] * length
+        histogram = [0]
+
+        for ele in range(length):
+            entry = self._buckets.get_at_index(ele)
+            if entry is None or entry.is_tombstone:
+                continue
+            counts[self._home(entry.hash, length)] += 1
+            probes = self._probe_count(ele, entry, length)
+            if probes >= len(histogram):
+                histogram.extend([0] * (probes + 1 - len(histogram)))
+            histogram[probes] += 1
+
+        return DistributionReport(histogram, counts, top)
+
+    def snapshot(self) -> HashMapView:
+        """
+        Method that returns a read only, point in time view of the hash map. Only the
+        bucket array is copied; each entry is copied by the first write to it
+        afterwards. Until the map is written to again, the same view is returned, so
+        read mostly code can take a snapshot before every batch of reads.
+        """
+        if self._snapshot is None:
+            if self._old_buckets is not None:
+                self._migrate(self._old_buckets.length())
+            self._snapshot = HashMapView(self, HashMap)
+            self._owned = set()
+        return self._snapshot
+
     def get_keys_and_values(self) -> DynamicArray:
         """
         Method that takes no parameters. Returns a DynamicArray that contains tuples
-        of all key:value pairs in the hash table.
+        of all key:value pairs in the hash table, including entries an incremental
+        resize has not migrated yet.
         """
         array = DynamicArray()
 
+        if self._old_buckets is not None:
+            for ele in range(self._migrate_index, self._old_buckets.length()):
+                entry = self._old_buckets.get_at_index(ele)
+                if entry is not None and not entry.is_tombstone:
+                    array.append((entry.key, entry.value))
+
         for ele in range(self._capacity):
             if self._buckets.get_at_index(ele) is not None and not self._buckets.get_at_index(ele).is_tombstone:
                 key = self._buckets.get_at_index(ele).key
@@ -245,6 +890,54 @@ class HashMap:
 
         return array
 
+    def __iter__(self):
+        """
+        Iterate over the keys, like keys()
+        """
+        return self.keys()
+
+    def keys(self):
+        """
+        Method that returns a generator over the keys of the hash map.
+        """
+        for entry in self._entries():
+            yield entry.key
+
+    def values(self):
+        """
+        Method that returns a generator over the values of the hash map.
+        """
+        for entry in self._entries():
+            yield entry.value
+
+    def items(self):
+        """
+        Method that returns a generator over (key, value) tuples of the hash map.
+        """
+        for entry in self._entries():
+            yield entry.key, entry.value
+
+    def _entries(self):
+        """
+        Helper generator that walks the buckets lazily and yields each live entry,
+        skipping empty buckets and tombstones, so a full scan needs no extra memory.
+        A pending incremental resize is finished first so lookups during the scan
+        cannot move entries. Raises RuntimeError if a key is added or removed, or
+        the table is resized, while it is iterating; changing the value of an
+        existing key is allowed.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_buckets.length())
+
+        modifications = self._modifications
+        buckets = self._buckets
+        for ele in range(buckets.length()):
+            entry = buckets.get_at_index(ele)
+            if entry is not None and not entry.is_tombstone:
+                yield entry
+                if self._modifications != modifications:
+                    raise RuntimeError("HashMap changed size during iteration")
+
 # ------------------- BASIC TESTING ---------------------------------------- #
 
 if __name__ == "__main__":
@@ -433,3 +1126,23 @@ if __name__ == "__main__":
     m.remove('1')
     m.resize_table(12)
     print(m.get_keys_and_values())
+
+    print("\nInstrumentation - keyword arguments")
+    print("-----------------------------------")
+    m = HashMap(11, 'fnv1a')
+    stats = m.enable_instrumentation()
+    m.put(key='a', value=1)
+    m.put_many(keys=['b', 'c'], values=[2, 3])
+    m.resize_table(new_capacity=100)
+    m.remove(key='a')
+    print(m.get(key='b'), list(m.get_many(keys=['c', 'd'])), m.get_capacity(),
+          stats.counters['put'], stats.counters['resizes'])
+
+    print("\nCompaction threshold - no rebuilds without tombstones")
+    print("-----------------------------------------------------")
+    for threshold in (0.5, 0.2):
+        m = HashMap(11, 'fnv1a', compaction_threshold=threshold)
+        stats = m.enable_instrumentation()
+        for i in range(2000):
+            m.put('key' + str(i), i)
+        print(threshold, m.get_capacity(), stats.counters['resizes'], round(m.table_load(), 3))
@@ -0,0 +1,404 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Compact open addressing hash table that uses Quadratic Probing. Instead of one
+#           HashEntry object per slot it keeps parallel flat arrays of keys, values, cached
+#           hashes and a one byte slot state (empty/live/tombstone). Public methods match the
+#           open addressing HashMap: put(), get(), remove(), contains_key(), clear(),
+#           empty_buckets(), resize_table(), table_load() and get_keys_and_values()
+
+
+from array import array
+import tracemalloc
+
+from a6_include import (DynamicArray, PROBE_SEQUENCES,
+                        get_hash_function, hash_function_2,
+                        hash_batch, is_prime, next_prime)
+from hash_map_oa import HashMap
+
+
+# slot states stored in the _states bytearray
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# cached hashes are kept as unsigned 64 bit integers
+_HASH_MASK = (1 << 64) - 1
+
+
+class CompactHashMap:
+    def __init__(self, capacity: int, function, compaction_threshold: float = 0.5,
+                 probing: str = 'quadratic') -> None:
+        """
+        Initialize new compact HashMap that uses
+        quadratic probing for collision resolution, or another probe
+        sequence from PROBE_SEQUENCES picked with probing.
+        compaction_threshold is the share of slots holding live entries or
+        tombstones at which put() rebuilds the table to drop the tombstones.
+        function is a hash function or the name of one in HASH_FUNCTIONS.
+        """
+        if not 0 < compaction_threshold <= 0.5:
+            raise ValueError("compaction_threshold must be in (0, 0.5]")
+        if probing not in PROBE_SEQUENCES:
+            raise ValueError(f"probing must be one of {', '.join(PROBE_SEQUENCES)}")
+
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = get_hash_function(function)
+        self._size = 0
+        self._tombstones = 0
+        self._compaction_threshold = compaction_threshold
+        self._probe_sequence = PROBE_SEQUENCES[probing]
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as the HashMap
+        """
+        out = ''
+        for i in range(self._capacity):
+            out += str(i) + ': ' + self._slot_str(i) + '\n'
+        return out
+
+    def _slot_str(self, index: int) -> str:
+        """
+        Return the HashEntry style string for a single slot
+        """
+        if self._states[index] == EMPTY:
+            return 'None'
+        return f"K: {self._keys[index]} V: {self._values[index]} TS: {self._states[index] == TOMBSTONE}"
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replace the storage arrays with empty arrays of the given capacity
+        """
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._states = bytearray(capacity)
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number, using the
+        GROWTH_PRIMES table and a Miller-Rabin test instead of trial division
+        """
+        return next_prime(capacity)
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        return is_prime(capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def get_tombstones(self) -> int:
+        """
+        Return number of tombstones currently in the table
+        """
+        return self._tombstones
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash: int) -> int:
+        """
+        Helper that probes for key. Returns the index of the live slot holding the
+        key, or -1 if the key is not in the table.
+        """
+        states = self._states
+        keys = self._keys
+        hashes = self._hashes
+        capacity = self._capacity
+
+        for index in self._probe_sequence(hash % capacity, hash, capacity):
+            state = states[index]
+            if state == EMPTY:
+                return -1
+            if state == LIVE and hashes[index] == hash and keys[index] == key:
+                return index
+
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method to put a key:value into the hash map. Grows the table to double its
+        capacity once the load factor reaches 0.5. Returns None.
+        """
+        self._put_entry(key, value, self._hash_function(key) & _HASH_MASK)
+
+    def _put_entry(self, key: str, value: object, hash: int) -> None:
+        """
+        Helper for put() that takes an already computed, masked hash for the key.
+        """
+        if self.table_load() >= 0.5:
+            self.resize_table(self._capacity * 2)
+        elif self.table_occupancy() >= self._compaction_threshold:
+            self._compact()
+
+        self._put_hashed(key, value, hash)
+
+    def _compact(self) -> None:
+        """
+        Helper that rebuilds the table to drop its tombstones, keeping the capacity
+        unless live entries alone fill half the threshold.
+        """
+        if self.table_load() < self._compaction_threshold / 2:
+            self.resize_table(self._capacity)
+        else:
+            self.resize_table(self._capacity * 2)
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Helper that stores key:value without checking the load factor. Overwrites the
+        value if the key is live, otherwise reuses the first tombstone on its probe path.
+        """
+        states = self._states
+        keys = self._keys
+        hashes = self._hashes
+        capacity = self._capacity
+        free = -1
+
+        for index in self._probe_sequence(hash % capacity, hash, capacity):
+            state = states[index]
+            if state == EMPTY:
+                if free == -1:
+                    free = index
+                break
+            if state == TOMBSTONE:
+                if free == -1:
+                    free = index
+            elif hashes[index] == hash and keys[index] == key:
+                self._values[index] = value
+                return
+
+        if free == -1:
+            # every slot the probe sequence reaches holds a live entry
+            self.resize_table(capacity * 2)
+            self._put_hashed(key, value, hash)
+            return
+
+        if states[free] == TOMBSTONE:
+            self._tombstones -= 1
+        keys[free] = key
+        self._values[free] = value
+        hashes[free] = hash
+        states[free] = LIVE
+        self._size += 1
+
+    def put_many(self, keys, values) -> None:
+        """
+        Method to put a batch of key:value pairs into the hash map. Hashes the whole
+        batch at once and grows the table a single time, to the capacity repeated put()
+        calls would reach, before inserting. Returns None.
+        """
+        keys, values = list(keys), list(values)
+        if len(keys) != len(values):
+            raise ValueError("put_many() needs the same number of keys and values")
+        if not keys:
+            return
+
+        # replay the checks put() makes before storing each pair, growing or compacting
+        # once to the capacity the put() loop would end at; keys already in the map are
+        # updated in place and add nothing
+        hashes = hash_batch(self._hash_function, keys)
+        batch = {keys[ele]: hashes[ele] & _HASH_MASK for ele in range(len(keys))}
+        added = {key for key, hash in batch.items() if self._find(key, hash) == -1}
+        size, capacity, tombstones, rebuild = self._size, self._capacity, self._tombstones, False
+        for key in keys:
+            if size / capacity >= 0.5:
+                capacity, tombstones, rebuild = self._next_prime(capacity * 2), 0, True
+            elif (size + tombstones) / capacity >= self._compaction_threshold:
+                if size / capacity >= self._compaction_threshold / 2:
+                    capacity = self._next_prime(capacity * 2)
+                tombstones, rebuild = 0, True
+            if key in added:
+                added.remove(key)
+                size += 1
+        if rebuild:
+            self.resize_table(capacity)
+
+        for ele in range(len(keys)):
+            self._put_hashed(keys[ele], values[ele], hashes[ele] & _HASH_MASK)
+
+    def table_load(self) -> float:
+        """
+        Method to return the load factor. Takes no parameters and return load factor.
+        """
+        return self._size / self._capacity
+
+    def table_occupancy(self) -> float:
+        """
+        Method to return the share of slots holding either a live entry or a tombstone.
+        """
+        return (self._size + self._tombstones) / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Method that returns the number of slots that have never held an entry.
+        """
+        return self._states.count(EMPTY)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method that resizes the table to the next prime at or above new_capacity and
+        re-inserts every live entry using its cached hash, dropping tombstones. Returns None.
+        """
+        if new_capacity < 1 or new_capacity < self._size:
+            return
+
+        if self._is_prime(new_capacity):
+            capacity = new_capacity
+        else:
+            capacity = self._next_prime(new_capacity)
+
+        old_keys, old_values = self._keys, self._values
+        old_hashes, old_states = self._hashes, self._states
+
+        self._capacity = capacity
+        self._allocate(capacity)
+        self._size = 0
+        self._tombstones = 0
+
+        for index in range(len(old_states)):
+            if old_states[index] == LIVE:
+                self._put_entry(old_keys[index], old_values[index], old_hashes[index])
+
+    def get(self, key: str) -> object:
+        """
+        Method that returns the value associated with the given key, or None if the
+        key is not in the hash table.
+        """
+        index = self._find(key, self._hash_function(key) & _HASH_MASK)
+        if index != -1:
+            return self._values[index]
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method that looks up a batch of keys. Returns a DynamicArray with the value
+        (or None) for each key in order.
+        """
+        keys = list(keys)
+        hashes = hash_batch(self._hash_function, keys)
+        array = DynamicArray()
+
+        for ele in range(len(keys)):
+            index = self._find(keys[ele], hashes[ele] & _HASH_MASK)
+            array.append(self._values[index] if index != -1 else None)
+
+        return array
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method that returns True if the key is in the hash table with a value other
+        than None, otherwise False, like HashMap.contains_key().
+        """
+        return self.get(key) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Method that removes a key:value from the hash table by marking its slot as a
+        tombstone. Returns None.
+        """
+        self._remove_hashed(key, self._hash_function(key) & _HASH_MASK)
+
+    def _remove_hashed(self, key: str, hash: int) -> None:
+        """
+        Helper for remove() that takes an already computed, masked hash for the key.
+        """
+        index = self._find(key, hash)
+        if index != -1:
+            self._states[index] = TOMBSTONE
+            self._keys[index] = None
+            self._values[index] = None
+            self._size -= 1
+            self._tombstones += 1
+
+    def remove_many(self, keys) -> None:
+        """
+        Method that removes a batch of keys from the hash table. Returns None.
+        """
+        keys = list(keys)
+        hashes = hash_batch(self._hash_function, keys)
+
+        for ele in range(len(keys)):
+            self._remove_hashed(keys[ele], hashes[ele] & _HASH_MASK)
+
+    def clear(self) -> None:
+        """
+        Method that clears the hash table while keeping its capacity. Returns None.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method that returns a DynamicArray of (key, value) tuples for every live entry.
+        """
+        array = DynamicArray()
+        states = self._states
+
+        for index in range(self._capacity):
+            if states[index] == LIVE:
+                array.append((self._keys[index], self._values[index]))
+
+        return array
+
+
+def memory_comparison(count: int, function=hash_function_2) -> (int, int):
+    """
+    Build a HashMap and a CompactHashMap holding the same count string keys and
+    return the number of bytes each one allocated, as (hash_map, compact).
+    """
+    keys = ['key' + str(i) for i in range(count)]
+    results = []
+
+    for map_class in (HashMap, CompactHashMap):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        m = map_class(11, function)
+        for ele in range(count):
+            m.put(keys[ele], ele)
+        results.append(tracemalloc.get_traced_memory()[0] - before)
+        tracemalloc.stop()
+        del m
+
+    return results[0], results[1]
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nCompact - correctness against dict")
+    print("----------------------------------")
+    c = CompactHashMap(79, hash_function_2)
+    expected = {}
+    for i in range(1, 1000, 13):
+        c.put(str(i), i * 42)
+        expected[str(i)] = i * 42
+    for i in range(1, 1000, 39):
+        c.remove(str(i))
+        expected.pop(str(i), None)
+    result = c.get_size() == len(expected)
+    for i in range(1, 1000):
+        result &= c.get(str(i)) == expected.get(str(i))
+    print(c.get_size(), c.get_capacity(), result)
+
+    print("\nCompact - memory comparison")
+    print("---------------------------")
+    print(f"{'entries':>10} {'HashMap':>14} {'Compact':>14} {'ratio':>7}")
+    for count in (1000, 10000, 40000):
+        entry_bytes, compact_bytes = memory_comparison(count)
+        print(f"{count:>10} {entry_bytes:>14,} {compact_bytes:>14,} {entry_bytes / compact_bytes:>7.2f}")
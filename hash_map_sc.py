@@ -8,29 +8,87 @@
 #           and find_mode()
 
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+import inspect
+import math
+
+from a6_include import (DistributionReport, DynamicArray, HashMapView, Instrumentation,
+                        LinkedList, bucket_indices, get_hash_function, hash_function_1,
+                        hash_function_2, hash_batch, is_prime, mix_hash, next_power_of_two,
+                        next_prime)
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 incremental_resize: bool = False,
+                 migration_step: int = 4,
+                 max_load_factor: float = None,
+                 min_load_factor: float = None,
+                 expected_size: int = None,
+                 power_of_two: bool = False) -> None:
         """
         Initialize new HashMap that uses
-        separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        separate chaining for collision resolution.
+        With incremental_resize, resize_table() only allocates the new buckets and
+        every later put/get/remove moves migration_step chains into them.
+        With max_load_factor set, put() doubles the capacity once the load factor
+        goes above it; with min_load_factor set, remove() halves the capacity once
+        the load factor drops below it, never going under the initial capacity.
+        expected_size raises the initial capacity so that many keys fit without
+        growing.
+        With power_of_two the capacity is a power of two instead of a prime and
+        buckets are picked by masking the hash after an avalanche mixing step.
+        function is a hash function or the name of one in HASH_FUNCTIONS.
         """
+        if migration_step < 1:
+            raise ValueError("migration_step must be at least 1")
+        if max_load_factor is not None and max_load_factor <= 0:
+            raise ValueError("max_load_factor must be positive")
+        if min_load_factor is not None:
+            if max_load_factor is None or not 0 < 2 * min_load_factor < max_load_factor:
+                raise ValueError("min_load_factor needs a max_load_factor more than twice as large")
+
+        if expected_size is not None:
+            capacity = max(capacity, math.ceil(expected_size / (max_load_factor or 1.0)))
+
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number, or a power of two in power_of_two mode
+        self._power_of_two = power_of_two
+        self._capacity = next_power_of_two(capacity) if power_of_two else self._next_prime(capacity)
         for _ in range(self._capacity):
             self._buckets.append(LinkedList())
 
-        self._hash_function = function
+        self._hash_function = get_hash_function(function)
         self._size = 0
 
+        # bucket array being drained by an incremental resize, None when idle
+        self._incremental_resize = incremental_resize
+        self._migration_step = migration_step
+        self._old_buckets = None
+        self._migrate_index = 0
+
+        # slots of the array an incremental resize allocates all share this empty chain
+        # until _migrate() (or the first write to the slot) gives them their own
+        self._empty_chain = LinkedList()
+        self._fill_index = 0
+
+        self._max_load_factor = max_load_factor
+        self._min_load_factor = min_load_factor
+        self._min_capacity = self._capacity
+
+        # operation counters, None unless enable_instrumentation() was called
+        self._instrumentation = None
+
+        # bumped by every insert, removal and resize so iterators can spot changes
+        self._modifications = 0
+
+        # view returned by snapshot() until the next write, and the ids of the chains
+        # copied since it was taken; None when no snapshot shares the chains
+        self._snapshot = None
+        self._owned = None
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -43,36 +101,17 @@ class HashMap:
 
     def _next_prime(self, capacity: int) -> int:
         """
-        Increment from given number and the find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Increment from given number to find the closest prime number, using the
+        GROWTH_PRIMES table and a Miller-Rabin test instead of trial division
         """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity == 2 or capacity == 3:
-            return True
-
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
-
-        return True
+        return is_prime(capacity)
 
     def get_size(self) -> int:
         """
@@ -88,6 +127,110 @@ class HashMap:
         """
         return self._capacity
 
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Return the capacity resize_table() uses for a requested capacity: the
+        next power of two in power_of_two mode, else the next prime
+        """
+        if self._power_of_two:
+            return next_power_of_two(capacity)
+        if self._is_prime(capacity):
+            return capacity
+        return self._next_prime(capacity)
+
+    def _hash_key(self, key: str) -> int:
+        """
+        Return the hash the table stores for key, mixed in power_of_two mode
+        """
+        if self._power_of_two:
+            return mix_hash(self._hash_function(key))
+        return self._hash_function(key)
+
+    def _hash_keys(self, keys: list) -> DynamicArray:
+        """
+        Batch version of _hash_key()
+        """
+        hashes = hash_batch(self._hash_function, keys)
+        if self._power_of_two:
+            for ele in range(hashes.length()):
+                hashes[ele] = mix_hash(hashes[ele])
+        return hashes
+
+    def _home(self, hash: int, length: int) -> int:
+        """
+        Return the bucket a stored hash maps to in a bucket array of the given length
+        """
+        if self._power_of_two:
+            return hash & (length - 1)
+        return hash % length
+
+    def is_migrating(self) -> bool:
+        """
+        Return True while an incremental resize is still moving chains
+        """
+        return self._old_buckets is not None
+
+    def migration_progress(self) -> float:
+        """
+        Return the share of old chains an incremental resize has moved so far,
+        1.0 when no resize is in progress
+        """
+        if self._old_buckets is None:
+            return 1.0
+        return self._migrate_index / self._old_buckets.length()
+
+    def enable_instrumentation(self) -> Instrumentation:
+        """
+        Start counting operations, chain steps, collisions and resizes on this map
+        and return the Instrumentation holding the counters. Maps that never enable
+        it run the plain methods with no counting overhead.
+        """
+        if self._instrumentation is None:
+            stats = Instrumentation()
+            stats.install_operations(self)
+            for name in ('_put_hashed', '_get_hashed', '_remove_hashed'):
+                stats.install(self, name, self._counted_chain_walk(stats, getattr(self, name)))
+            self._instrumentation = stats
+        return self._instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """
+        Stop counting and go back to the plain methods
+        """
+        if self._instrumentation is not None:
+            self._instrumentation.uninstall(self)
+            self._instrumentation = None
+
+    def get_instrumentation(self) -> Instrumentation:
+        """
+        Return the Instrumentation of this map, or None while it is disabled
+        """
+        return self._instrumentation
+
+    def _counted_chain_walk(self, stats: Instrumentation, method: callable) -> callable:
+        """
+        Helper that wraps one of the hashed helpers to count the chain nodes its
+        lookup walks, and a collision when it walks past another key
+        """
+        counters = stats.counters
+        # where hash sits among the arguments after key, for calls that pass it by position
+        position = list(inspect.signature(method).parameters).index('hash') - 1
+
+        def counted(key, *args, **kwargs):
+            hash = kwargs['hash'] if 'hash' in kwargs else args[position]
+            steps, found = 0, False
+            for node in self._bucket_for(hash):
+                steps += 1
+                if node.hash == hash and node.key == key:
+                    found = True
+                    break
+            counters['probes'] += steps
+            if steps > found:
+                counters['collisions'] += 1
+            return method(key, *args, **kwargs)
+
+        return counted
+
     # ------------------------------------------------------------------ #
 
     def put(self, key: str, value: object) -> None:
@@ -97,17 +240,163 @@ class HashMap:
         in the bucket that the value is associated with. Adds Key: value to index and
         returns None.
         """
-        hash = self._hash_function(key)
-        index = hash % self.get_capacity()
-        linked_list = self._buckets.get_at_index(index)
+        self._put_hashed(key, value, self._hash_key(key))
+        self._grow()
 
+    def upsert(self, key: str, value: object) -> object:
+        """
+        Method that stores value under key like put(), and returns the value the key
+        held before, or None if the key was new.
+        """
+        previous = self._put_hashed(key, value, self._hash_key(key))
+        self._grow()
+        return previous
 
-        if linked_list.contains(key):
-            linked_list.remove(key)
-            linked_list.insert(key, value)
-        else:
-            linked_list.insert(key, value)
+    def put_if_absent(self, key: str, value: object) -> object:
+        """
+        Method that stores value under key only if the key is not in the hash map yet.
+        Returns the value already stored for the key, or None if value was added.
+        """
+        previous = self._put_hashed(key, value, self._hash_key(key), overwrite=False)
+        self._grow()
+        return previous
+
+    def _put_hashed(self, key: str, value: object, hash: int, overwrite: bool = True) -> object:
+        """
+        Helper for put() that takes an already computed hash for the key. Walks the
+        chain once (twice when it has to be copied for a snapshot first): an existing
+        node gets its value replaced in place (unless overwrite is False), otherwise a
+        new node is added. Returns the previous value or None.
+        """
+        self._migrate(self._migration_step)
+        chain = self._bucket_for(hash)
+
+        node = chain.contains(key, hash)
+        if node is not None and not overwrite:
+            return node.value
+
+        linked_list = self._writable_bucket(hash)
+        if linked_list is not chain and node is not None:
+            # the chain was just copied for a snapshot, so update the copy's node
+            node = linked_list.contains(key, hash)
+
+        if node is None:
+            linked_list.insert(key, value, hash)
             self._size += 1
+            self._modifications += 1
+            return None
+
+        previous, node.value = node.value, value
+        return previous
+
+    def _grow(self) -> None:
+        """
+        Helper that doubles the capacity once the load factor goes above max_load_factor.
+        """
+        if self._max_load_factor is not None and self.table_load() > self._max_load_factor:
+            self.resize_table(self._capacity * 2)
+
+    def _bucket_for(self, hash: int) -> LinkedList:
+        """
+        Helper that returns the chain a key with the given hash currently lives in.
+        During an incremental resize that is the old chain until it has been moved.
+        """
+        if self._old_buckets is not None:
+            old_index = self._home(hash, self._old_buckets.length())
+            if old_index >= self._migrate_index:
+                return self._old_buckets.get_at_index(old_index)
+
+        return self._buckets.get_at_index(self._home(hash, self._capacity))
+
+    def _writable_bucket(self, hash: int) -> LinkedList:
+        """
+        Helper that returns the chain _bucket_for() would, ready to be written to.
+        """
+        if self._old_buckets is not None:
+            old_index = self._home(hash, self._old_buckets.length())
+            if old_index >= self._migrate_index:
+                return self._writable_chain(self._old_buckets, old_index)
+
+        return self._writable_chain(self._buckets, self._home(hash, self._capacity))
+
+    def _writable_chain(self, array: DynamicArray, index: int) -> LinkedList:
+        """
+        Helper that returns the chain at index of array for a write. While a snapshot
+        shares the chain, it is replaced by a copy first so the snapshot keeps the old one.
+        """
+        self._snapshot = None
+        chain = array.get_at_index(index)
+        if chain is self._empty_chain:
+            chain = LinkedList()
+            array.set_at_index(index, chain)
+            if self._owned is not None:
+                self._owned.add(id(chain))
+        elif self._owned is not None and id(chain) not in self._owned:
+            chain = chain.copy()
+            array.set_at_index(index, chain)
+            self._owned.add(id(chain))
+        return chain
+
+    def _migrate(self, chains: int) -> None:
+        """
+        Helper that moves up to chains chains from the array being drained by an
+        incremental resize into the current buckets, releasing each moved chain.
+        Slots of the current buckets still sharing the empty chain get their own
+        chain at the same pace, so none are left when the last chain has moved.
+        """
+        old_array = self._old_buckets
+        if old_array is None:
+            return
+
+        buckets, capacity = self._buckets, self._capacity
+        end = min(self._migrate_index + chains, old_array.length())
+        for bucket in range(self._migrate_index, end):
+            for node in old_array.get_at_index(bucket):
+                index = self._home(node.hash, capacity)
+                chain = buckets.get_at_index(index)
+                if chain is self._empty_chain:
+                    chain = LinkedList()
+                    buckets.set_at_index(index, chain)
+                chain.insert(node.key, node.value, node.hash)
+            # drop the moved chain now so the old array is not freed all at once at the end
+            old_array.set_at_index(bucket, None)
+        self._migrate_index = end
+
+        fill = capacity if end == old_array.length() else end * capacity // old_array.length()
+        for index in range(self._fill_index, fill):
+            if buckets.get_at_index(index) is self._empty_chain:
+                buckets.set_at_index(index, LinkedList())
+        self._fill_index = max(self._fill_index, fill)
+
+        if end == old_array.length():
+            self._old_buckets = None
+            self._migrate_index = 0
+
+    def put_many(self, keys, values) -> None:
+        """
+        Method to add a batch of key/value pairs to the hash map. Takes a sequence of
+        keys and a sequence of values of the same length, hashes the whole batch at
+        once and inserts each pair as put() would. Returns None.
+        """
+        keys, values = list(keys), list(values)
+        if len(keys) != len(values):
+            raise ValueError("put_many() needs the same number of keys and values")
+
+        hashes = self._hash_keys(keys)
+        if self._max_load_factor is not None and keys:
+            # grow once, along the same doubling chain as put(), for the final count;
+            # keys already in the map are updated in place and do not add to the size
+            batch = {keys[ele]: hashes[ele] for ele in range(len(keys))}
+            final_size = self._size + sum(self._bucket_for(hash).contains(key, hash) is None
+                                          for key, hash in batch.items())
+            capacity = self._capacity
+            while final_size / capacity > self._max_load_factor:
+                capacity = self._round_capacity(capacity * 2)
+            if capacity != self._capacity:
+                self.resize_table(capacity)
+
+        for ele in range(len(keys)):
+            self._put_hashed(keys[ele], values[ele], hashes[ele])
 
     def empty_buckets(self) -> int:
         """
@@ -142,6 +431,11 @@ class HashMap:
 
         self._buckets = DynamicArray()
         self._size = 0
+        self._old_buckets = None
+        self._migrate_index = 0
+        self._modifications += 1
+        self._snapshot = None
+        self._owned = None
 
         for index in range(0, self._capacity):
             self._buckets.append(LinkedList())
@@ -150,28 +444,72 @@ class HashMap:
         """
         Method that takes a capacity for its input and returns None. First determines
         if the new_capacity is prime. If it is then uses this capacity to re-map hash table
-        to new capacity. Otherwise determines the next available prime to use and re-maps hash
-        table.
+        to new capacity. Otherwise determines the next available prime (the next power of two
+        in power_of_two mode) to use and re-maps hash table. Entries are re-inserted using
+        their cached hash so the hash function is not called again. In incremental mode
+        only the new bucket array is allocated here, its slots sharing one empty chain,
+        and the chains are moved and allocated by later operations.
         """
         if new_capacity < 1:
             return
 
-        if self._is_prime(new_capacity):
-            capacity = new_capacity
-        else:
-            capacity = self._next_prime(new_capacity)
+        if self._old_buckets is not None:
+            self._migrate(self._old_buckets.length())
+
+        capacity = self._round_capacity(new_capacity)
 
         old_cap = self._capacity
         old_array = self._buckets
 
+        if self._incremental_resize:
+            self._old_buckets = old_array
+            self._migrate_index = 0
+            self._fill_index = 0
+            self._capacity = capacity
+            # one shared empty chain per slot; allocating every chain here would stall this call
+            self._buckets = DynamicArray([self._empty_chain] * capacity)
+            self._modifications += 1
+            return
+
         self._capacity = capacity
         self.clear()
 
+        # keys are already unique, so nodes go straight to the front of their new chain
         for bucket in range(old_cap):
             if old_array.get_at_index(bucket).length() > 0:
-                for linked_list in old_array.get_at_index(bucket):
-                    self.put(linked_list.key, linked_list.value)
+                for node in old_array.get_at_index(bucket):
+                    self._buckets.get_at_index(self._home(node.hash, capacity)).insert(node.key, node.value, node.hash)
+                    self._size += 1
+
+    def parallel_resize_table(self, new_capacity: int, workers: int = 1, pool=None) -> None:
+        """
+        Method that re-maps the hash table like resize_table(), for very large tables.
+        The cached hashes of all nodes are collected in one pass, their new buckets are
+        computed by bucket_indices() (with NumPy, or, for tables of at least
+        PARALLEL_BUCKET_MIN nodes, split over workers processes, None meaning one per
+        CPU, on pool if given; serial by default), and the nodes are scattered into
+        the new buckets in a second pass. A pending incremental resize is finished
+        first; this one always completes right away.
+        """
+        if new_capacity < 1:
+            return
+
+        if self._old_buckets is not None:
+            self._migrate(self._old_buckets.length())
+
+        capacity = self._round_capacity(new_capacity)
+        nodes = [node for chain in self._buckets for node in chain]
+        homes = bucket_indices([node.hash for node in nodes], capacity, self._power_of_two, workers, pool)
 
+        buckets = [LinkedList() for _ in range(capacity)]
+        for node, home in zip(nodes, homes):
+            buckets[home].insert(node.key, node.value, node.hash)
+
+        self._buckets = DynamicArray(buckets)
+        self._capacity = capacity
+        self._modifications += 1
+        self._snapshot = None
+        self._owned = None
 
     def get(self, key: str) -> object:
         """
@@ -179,15 +517,32 @@ class HashMap:
         returns the value of the key if it is in the hash map else returns
         None.
         """
-        hash_map = self._buckets
+        return self._get_hashed(key, self._hash_key(key))
 
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+    def _get_hashed(self, key: str, hash: int) -> object:
+        """
+        Helper for get() that takes an already computed hash for the key.
+        """
+        self._migrate(self._migration_step)
 
-        if hash_map.get_at_index(index).contains(key):
-            node = hash_map.get_at_index(index).contains(key)
+        node = self._bucket_for(hash).contains(key, hash)
+        if node:
             return node.value
 
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method to get a batch of keys. Hashes the whole batch at once and returns
+        a DynamicArray with the value (or None) for each key in order.
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+        array = DynamicArray()
+
+        for ele in range(len(keys)):
+            array.append(self._get_hashed(keys[ele], hashes[ele]))
+
+        return array
+
     def contains_key(self, key: str) -> bool:
         """
         Method that iterates through the hash map and determines if the given key
@@ -204,22 +559,62 @@ class HashMap:
         Method to remove a key:value pair from the hashtable. Takes a key as
         parameter and removes that key from the SLL if it is present. Returns None.
         """
+        self._remove_hashed(key, self._hash_key(key))
+        self._shrink()
 
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+    def _remove_hashed(self, key: str, hash: int) -> None:
+        """
+        Helper for remove() that takes an already computed hash for the key.
+        """
+        self._migrate(self._migration_step)
 
-        if self.contains_key(key):
-            self._buckets.get_at_index(index).remove(key)
+        if self._writable_bucket(hash).remove(key, hash):
             self._size -= 1
+            self._modifications += 1
+
+    def remove_many(self, keys) -> None:
+        """
+        Method to remove a batch of keys from the hashtable. Hashes the whole batch
+        at once, keys that are not present are ignored. Returns None.
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+
+        for ele in range(len(keys)):
+            self._remove_hashed(keys[ele], hashes[ele])
+        self._shrink()
+
+    def _shrink(self) -> None:
+        """
+        Helper that halves the capacity, as often as needed, while the load factor is
+        below min_load_factor. Never shrinks under the initial capacity, nor to a
+        capacity the next put() would have to grow again.
+        """
+        if self._min_load_factor is None:
+            return
+
+        capacity = self._capacity
+        while self._size / capacity < self._min_load_factor and capacity // 2 >= self._min_capacity:
+            smaller = self._round_capacity(capacity // 2)
+            if (self._size + 1) / smaller > self._max_load_factor:
+                break
+            capacity = smaller
+        if capacity != self._capacity:
+            self.resize_table(capacity)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Method that takes no parameters. It then iterates through the hash table and
-        appends a tuple containing (key,value) of each node to a dynamic array. Returns
-        the array.
+        appends a tuple containing (key,value) of each node to a dynamic array, including
+        chains an incremental resize has not moved yet. Returns the array.
         """
         array = DynamicArray()
 
+        if self._old_buckets is not None:
+            for ele in range(self._migrate_index, self._old_buckets.length()):
+                for node in self._old_buckets.get_at_index(ele):
+                    array.append((node.key, node.value))
+
         for ele in range(self._capacity):
             if self._buckets.get_at_index(ele).length() > 0:
                 for node in self._buckets.get_at_index(ele):
@@ -227,50 +622,125 @@ class HashMap:
 
         return array
 
+    def __iter__(self):
+        """
+        Iterate over the keys, like keys()
+        """
+        return self.keys()
+
+    def keys(self):
+        """
+        Method that returns a generator over the keys of the hash map.
+        """
+        for node in self._nodes():
+            yield node.key
+
+    def values(self):
+        """
+        Method that returns a generator over the values of the hash map.
+        """
+        for node in self._nodes():
+            yield node.value
+
+    def items(self):
+        """
+        Method that returns a generator over (key, value) tuples of the hash map.
+        """
+        for node in self._nodes():
+            yield node.key, node.value
+
+    def _nodes(self):
+        """
+        Helper generator that walks the buckets lazily, one node at a time, so a full
+        scan needs no extra memory. A pending incremental resize is finished first so
+        lookups during the scan cannot move nodes. Raises RuntimeError if a key is
+        added or removed, or the table is resized, while it is iterating; changing
+        the value of an existing key is allowed.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_buckets.length())
+
+        modifications = self._modifications
+        buckets = self._buckets
+        for ele in range(buckets.length()):
+            for node in buckets.get_at_index(ele):
+                yield node
+                if self._modifications != modifications:
+                    raise RuntimeError("HashMap changed size during iteration")
+
+    def snapshot(self) -> HashMapView:
+        """
+        Method that returns a read only, point in time view of the hash map. Only the
+        array of chains is copied; each chain is copied by the first write to it
+        afterwards. Until the map is written to again, the same view is returned, so
+        read mostly code can take a snapshot before every batch of reads.
+        """
+        if self._snapshot is None:
+            if self._old_buckets is not None:
+                self._migrate(self._old_buckets.length())
+            self._snapshot = HashMapView(self, HashMap)
+            self._owned = set()
+        return self._snapshot
+
+    def analyze(self, top: int = 5) -> DistributionReport:
+        """
+        Method that measures how the keys are spread over the buckets in one pass over
+        the bucket array. Returns a DistributionReport with the chain length histogram
+        and the top fullest buckets. Chains an incremental resize has not moved yet are
+        counted in the bucket they will move to.
+        """
+        counts = [0] * self._capacity
+        for ele in range(self._capacity):
+            counts[ele] = self._buckets.get_at_index(ele).length()
+
+        if self._old_buckets is not None:
+            for ele in range(self._migrate_index, self._old_buckets.length()):
+                for node in self._old_buckets.get_at_index(ele):
+                    counts[self._home(node.hash, self._capacity)] += 1
+
+        histogram = [0] * (max(counts) + 1)
+        for count in counts:
+            histogram[count] += 1
+
+        return DistributionReport(histogram, counts, top)
+
 
 def find_mode(da: DynamicArray) -> (DynamicArray, int):
     """
     Method that takes a dynamic array for its parameter and returns a tuple containing the mode and frequency of
     the dynamic array. First creates a hash map with the key and value being the frequency of the key. Then iterates
-    through the hashmap to determine which key is the mode and what frequency the key is repeated.
+    through the array once more, in order, to collect the keys repeated as often as the mode. The map grows with the
+    number of distinct keys, so both passes stay linear. For input too large to hold in a DynamicArray, see
+    find_mode_stream() in hash_map_mode.py.
     """
 
-    map = HashMap()
+    map = HashMap(11, 'fnv1a', max_load_factor=1.0)
 
     for ele in range(da.length()):  #Create a hash map containing the key as the array value and frequency of repitiion for the value.
         key = da.get_at_index(ele)
-        hash = hash_function_1(key)
-        index = hash % map.get_capacity()
-        if map.contains_key(key):
-            value = map.get(key)
-            value += 1
-            map.put(key, value)
-        else:
-            map.put(key, 1)
+        count = map.put_if_absent(key, 1)
+        if count is not None:
+            map.put(key, count + 1)
 
     array = DynamicArray()          #Empty array for later return tuple.
     mode = None
 
-    for ele in range(da.length()):  #Iterate through map and determine which keys are the mode. Add to array.
+    for ele in range(da.length()):  #Visit each key once, in order of first appearance, removing it once counted.
         key = da.get_at_index(ele)
-        hash = hash_function_1(key)
-        index = hash % map.get_capacity()
-
-        if map.get(key):
-            if mode is None:        #First index
-                mode = map.get(key)
-                array.append(key)
-                map.remove(key)
-            elif map.get(key) > mode:   #New mode/create new DA
-                array = DynamicArray()
-                mode = map.get(key)
-                array.append(key)
-                map.remove(key)
-            elif map.get(key) == mode:  #Append string to DA frequency does not change.
-                array.append(key)
-                map.remove(key)
+        count = map.get(key)
+        if count is None:
+            continue
+        map.remove(key)
+
+        if mode is None or count > mode:    #First key or new mode/create new DA
+            array = DynamicArray()
+            mode = count
+            array.append(key)
+        elif count == mode:                 #Append string to DA frequency does not change.
+            array.append(key)
 
     return (array, mode)
+
 # ------------------- BASIC TESTING ---------------------------------------- #
 
 if __name__ == "__main__":
@@ -474,3 +944,29 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nLoad factor bounds - remove/put at the shrink boundary")
+    print("-----------------------------------------------------")
+    m = HashMap(11, 'fnv1a', max_load_factor=1.0, min_load_factor=0.49)
+    for i in range(12):
+        m.put('key' + str(i), i)
+    capacities = set()
+    for _ in range(100):
+        m.remove('key11')
+        capacities.add(m.get_capacity())
+        m.put('key11', 11)
+        capacities.add(m.get_capacity())
+    print(m.get_size(), sorted(capacities))
+
+    print("\nInstrumentation - keyword arguments")
+    print("-----------------------------------")
+    m = HashMap(11, 'fnv1a', max_load_factor=1.0)
+    stats = m.enable_instrumentation()
+    m.put(key='a', value=1)
+    m.put_many(keys=['b', 'c'], values=[2, 3])
+    m._put_hashed('d', 4, hash=m._hash_key('d'), overwrite=False)
+    m._put_hashed('e', 5, m._hash_key('e'), False)
+    m.resize_table(new_capacity=100)
+    m.remove(key='a')
+    print(m.get(key='b'), list(m.get_many(keys=['c', 'd', 'e'])), m.get_capacity(),
+          stats.counters['put'], stats.counters['resizes'])
@@ -0,0 +1,396 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Sharded HashMap spread over worker processes. Keys are partitioned by a
+#           CRC-32 of the key across N shards, each an open addressing HashMap owned by its
+#           own process, so shards work in parallel without sharing the GIL. Every table lives
+#           in its worker's private memory: this is message passing, not a table in shared
+#           memory. The shared memory block of each shard only carries the pickled requests
+#           and replies, with a pipe signalling where the payload is, which saves pushing
+#           large batches through the pipe itself. Batch methods send every shard its part
+#           of the batch before waiting on any of them.
+
+
+from multiprocessing import Pipe, Process
+from multiprocessing.shared_memory import SharedMemory
+import os
+import pickle
+import time
+import zlib
+
+from a6_include import DynamicArray
+import hash_map_oa
+
+
+# shard methods a client may call; anything else is refused by the worker
+SHARD_OPERATIONS = ('put', 'get', 'remove', 'contains_key', 'put_many', 'get_many', 'remove_many',
+                    'get_size', 'get_capacity', 'get_keys_and_values', 'clear')
+
+
+class _Channel:
+    """
+    One end of the link between the client and a shard: a pipe for signals and a
+    shared memory block for the payloads. The two ends take turns, so one block
+    serves both directions. A payload that does not fit makes the sending end
+    move both ends to a new block twice its size.
+    """
+
+    def __init__(self, connection, name: str = None, size: int = 1 << 20) -> None:
+        """Attach to the block called name, or create one of size bytes."""
+        self._connection = connection
+        self._memory = SharedMemory(name) if name else SharedMemory(create=True, size=size)
+
+    def name(self) -> str:
+        """Return the name of the current shared memory block."""
+        return self._memory.name
+
+    def send(self, message: object) -> None:
+        """Pickle message into the block and signal the other end."""
+        self.send_pickled(pickle.dumps(message, pickle.HIGHEST_PROTOCOL))
+
+    def send_pickled(self, data: bytes) -> None:
+        """Copy an already pickled message into the block and signal the other end."""
+        if len(data) > self._memory.size:
+            old = self._memory
+            self._memory = SharedMemory(create=True, size=2 * len(data))
+            old.close()
+            old.unlink()
+        self._memory.buf[:len(data)] = data
+        self._connection.send((self._memory.name, len(data)))
+
+    def receive(self) -> object:
+        """Wait for a signal from the other end and unpickle its message."""
+        name, length = self._connection.recv()
+        if name != self._memory.name:
+            self._memory.close()
+            self._memory = SharedMemory(name)
+        return pickle.loads(self._memory.buf[:length])
+
+    def close(self, unlink: bool = False) -> None:
+        """Detach from the block, and remove it too with unlink."""
+        self._memory.close()
+        if unlink:
+            self._memory.unlink()
+        self._connection.close()
+
+
+def _serve(connection, name: str, function, capacity: int, options: dict) -> None:
+    """
+    Worker process loop. Owns one open addressing HashMap and answers (operation,
+    args) requests until it receives None or the client goes away. Replies are
+    (True, result) or (False, exception).
+    """
+    channel = _Channel(connection, name)
+    shard = hash_map_oa.HashMap(capacity, function, **options)
+
+    while True:
+        try:
+            request = channel.receive()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        operation, args = request
+        try:
+            if operation not in SHARD_OPERATIONS:
+                raise ValueError(f"unknown shard operation {operation!r}")
+            reply = (True, getattr(shard, operation)(*args))
+        except Exception as exception:
+            reply = (False, exception)
+        # the client waits for exactly one reply per request, so one must always be sent
+        try:
+            channel.send(reply)
+        except Exception as exception:
+            channel.send((False, RuntimeError(f"shard reply could not be pickled: {exception!r}")))
+
+    channel.close()
+
+
+class ShardedHashMap:
+    """
+    HashMap whose keys are partitioned over shards worker processes, each holding
+    an open addressing HashMap, built with function, capacity and options, in its
+    own memory; requests and replies travel as pickled messages. Keys
+    must be strings; keys and values must be picklable. The batch methods and
+    get_keys_and_values() run on every shard at once, which is where the speedup
+    comes from; single key calls cost a round trip to one worker each.
+    Call close() (or use a with-statement) to stop the workers.
+    """
+
+    def __init__(self, shards: int = None, function='fnv1a', capacity: int = 11,
+                 buffer_size: int = 1 << 20, **options) -> None:
+        """
+        Start shards worker processes, one per CPU by default.
+        """
+        shards = shards or os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+
+        self._channels = []
+        self._workers = []
+        for _ in range(shards):
+            client, worker = Pipe()
+            channel = _Channel(client, size=buffer_size)
+            process = Process(target=_serve, args=(worker, channel.name(), function, capacity, options),
+                              daemon=True)
+            process.start()
+            worker.close()
+            self._channels.append(channel)
+            self._workers.append(process)
+
+    def __enter__(self) -> 'ShardedHashMap':
+        """Support with-statements; the workers are stopped on exit."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Stop the workers at the end of a with-statement."""
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stop the workers and free the shared memory. The map cannot be used afterwards.
+        """
+        for channel in self._channels:
+            try:
+                channel.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._workers:
+            process.join()
+        for channel in self._channels:
+            channel.close(unlink=True)
+        self._channels = []
+        self._workers = []
+
+    def shard_count(self) -> int:
+        """
+        Return the number of shards
+        """
+        return len(self._channels)
+
+    def _shard(self, key: str) -> int:
+        """
+        Helper that returns the shard a key belongs to
+        """
+        return zlib.crc32(key.encode('utf-8')) % len(self._channels)
+
+    def _call(self, shard: int, operation: str, *args) -> object:
+        """
+        Helper that runs operation on one shard and returns its result
+        """
+        self._channels[shard].send((operation, args))
+        return self._result(shard)
+
+    def _result(self, shard: int) -> object:
+        """
+        Helper that waits for the reply of a shard, raising the exception it sent back
+        """
+        ok, result = self._channels[shard].receive()
+        if not ok:
+            raise result
+        return result
+
+    def _call_all(self, operation: str, args_per_shard=None) -> list:
+        """
+        Helper that sends operation to every shard (with its own args when given)
+        before waiting for any of them, so they all work at the same time. Returns
+        the results in shard order. Every request is pickled before any is sent, and
+        every reply is read before the first error is raised, so a failing batch
+        leaves no request or reply behind to mix up later calls.
+        """
+        requests = [pickle.dumps((operation, args_per_shard[shard] if args_per_shard else ()),
+                                 pickle.HIGHEST_PROTOCOL)
+                    for shard in range(len(self._channels))]
+        for channel, data in zip(self._channels, requests):
+            channel.send_pickled(data)
+
+        results, error = [], None
+        for shard in range(len(self._channels)):
+            try:
+                results.append(self._result(shard))
+            except Exception as exception:
+                results.append(None)
+                error = error or exception
+        if error is not None:
+            raise error
+        return results
+
+    def _partition(self, keys: list) -> list:
+        """
+        Helper that splits keys by shard. Returns one list of positions in keys per shard.
+        """
+        positions = [[] for _ in self._channels]
+        for ele in range(len(keys)):
+            positions[self._shard(keys[ele])].append(ele)
+        return positions
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method that adds a key/value pair to the shard that owns the key.
+        """
+        self._call(self._shard(key), 'put', key, value)
+
+    def get(self, key: str) -> object:
+        """
+        Method that returns the value of key, or None if it is not in the map.
+        """
+        return self._call(self._shard(key), 'get', key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method that returns True if key is in the map, otherwise False.
+        """
+        return self._call(self._shard(key), 'contains_key', key)
+
+    def remove(self, key: str) -> None:
+        """
+        Method that removes key from the map if it is present.
+        """
+        self._call(self._shard(key), 'remove', key)
+
+    def put_many(self, keys, values) -> None:
+        """
+        Method that adds a batch of key/value pairs, every shard storing its part
+        of the batch in parallel. Returns None.
+        """
+        keys, values = list(keys), list(values)
+        if len(keys) != len(values):
+            raise ValueError("put_many() needs the same number of keys and values")
+
+        args = [([keys[ele] for ele in part], [values[ele] for ele in part])
+                for part in self._partition(keys)]
+        self._call_all('put_many', args)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method that looks up a batch of keys on every shard in parallel. Returns a
+        DynamicArray with the value (or None) for each key in order.
+        """
+        keys = list(keys)
+        positions = self._partition(keys)
+        results = self._call_all('get_many', [([keys[ele] for ele in part],) for part in positions])
+
+        values = [None] * len(keys)
+        for part, found in zip(positions, results):
+            for ele in range(len(part)):
+                values[part[ele]] = found[ele]
+        return DynamicArray(values)
+
+    def remove_many(self, keys) -> None:
+        """
+        Method that removes a batch of keys, every shard removing its part in
+        parallel. Keys that are not present are ignored. Returns None.
+        """
+        keys = list(keys)
+        self._call_all('remove_many', [([keys[ele] for ele in part],) for part in self._partition(keys)])
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method that collects the (key, value) tuples of every shard, gathered in
+        parallel, into one DynamicArray.
+        """
+        array = DynamicArray()
+        for pairs in self._call_all('get_keys_and_values'):
+            for ele in range(pairs.length()):
+                array.append(pairs[ele])
+        return array
+
+    def get_size(self) -> int:
+        """
+        Return size of map, the sum over the shards
+        """
+        return sum(self._call_all('get_size'))
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the sum over the shards
+        """
+        return sum(self._call_all('get_capacity'))
+
+    def shard_sizes(self) -> list:
+        """
+        Return the number of keys held by each shard
+        """
+        return self._call_all('get_size')
+
+    def clear(self) -> None:
+        """
+        Method that empties every shard.
+        """
+        self._call_all('clear')
+
+
+def sharding_benchmark(shard_counts=(1, 2, 4), count: int = 200000, batch: int = 20000) -> list:
+    """
+    Time put_many() and get_many() of count keys in batches of batch keys on a
+    single in-process open addressing HashMap and on a ShardedHashMap for each
+    shard count. Every sharded call pickles its batch to the workers and the
+    results back, so the numbers include that messaging cost.
+    Returns a list of (name, put keys/s, get keys/s).
+    """
+    keys = ['key' + str(i) for i in range(count)]
+    batches = [(keys[start:start + batch], list(range(start, start + batch)))
+               for start in range(0, count, batch)]
+    results = []
+
+    def run(name: str, m) -> None:
+        start = time.perf_counter()
+        for keys_batch, values_batch in batches:
+            m.put_many(keys_batch, values_batch)
+        middle = time.perf_counter()
+        for keys_batch, values_batch in batches:
+            m.get_many(keys_batch)
+        end = time.perf_counter()
+        results.append((name, count / (middle - start), count / (end - middle)))
+
+    run('single OA', hash_map_oa.HashMap(11, 'fnv1a'))
+    for shards in shard_counts:
+        with ShardedHashMap(shards, 'fnv1a') as m:
+            run(f'{shards} shards', m)
+
+    return results
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nSharded - correctness")
+    print("---------------------")
+    with ShardedHashMap(4, 'fnv1a') as m:
+        m.put_many(['key' + str(i) for i in range(10000)], [{'id': i} for i in range(10000)])
+        m.remove_many(['key' + str(i) for i in range(0, 10000, 3)])
+        m.put('extra', [1, 2, 3])
+        m.remove('key1')
+        values = m.get_many(['key' + str(i) for i in range(10000)])
+        expected = [None if i % 3 == 0 or i == 1 else {'id': i} for i in range(10000)]
+        print(m.get_size(), m.shard_sizes(), m.get('extra'), m.contains_key('key0'),
+              list(values) == expected, m.get_keys_and_values().length())
+
+    print("\nSharded - a failing batch leaves the map usable")
+    print("-----------------------------------------------")
+    with ShardedHashMap(4, 'fnv1a') as m:
+        m.put_many(['key' + str(i) for i in range(100)], list(range(100)))
+        for keys, values in ((['key1', 'key2'], [1, lambda: 2]),           # does not pickle
+                             (['key3', 'key4'], [3, 4, 5]),                 # lengths differ
+                             (['key5', 7], [5, 7])):                        # int key cannot be routed
+            try:
+                m.put_many(keys, values)
+            except Exception as exception:
+                print(type(exception).__name__, end=' ')
+        try:
+            # two of the four shards fail; the other two replies must still be read
+            m._call_all('get_many', [(['key0'],), (None,), (['key1'],), (None,)])
+        except Exception as exception:
+            print(type(exception).__name__)
+        m.put('after', 'ok')
+        print(m.get('key1'), m.get('after'), m.get_size(),
+              list(m.get_many(['key' + str(i) for i in range(100)])) == list(range(100)))
+
+    print(f"\nSharded - batched throughput, pickled messages to worker processes ({os.cpu_count()} CPUs)")
+    print("------------------------------------------------------------------------")
+    print(f"{'map':>10} {'put keys/s':>12} {'get keys/s':>12}")
+    for name, put_rate, get_rate in sharding_benchmark():
+        print(f"{name:>10} {put_rate:>12.0f} {get_rate:>12.0f}")
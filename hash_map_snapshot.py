@@ -0,0 +1,252 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Streaming binary snapshots of the separate chaining and open addressing
+#           HashMaps. write_snapshot() streams the entries out in fixed size chunks and
+#           read_snapshot() restores them into a table presized for the entry count, so the
+#           restore never resizes. When the hash function is stable across processes the
+#           cached hashes are stored too and the restore does not call it at all. Values are
+#           pickled, so only restore snapshots from a trusted source.
+#
+#           Snapshot layout (little endian):
+#             header   magic 'A6SN', version u16, kind u8 (0 = SC, 1 = OA), flags u8,
+#                      entry count u64, capacity u64,
+#                      hash function name (u8 length + ASCII)
+#             entries  [hash u64 when flags has HASHES], key length u32, value length u32,
+#                      UTF-8 key, pickled value
+
+
+import io
+import os
+import pickle
+import struct
+import tempfile
+import time
+
+from a6_include import HASH_FUNCTIONS, HashEntry, get_hash_function
+import hash_map_oa
+import hash_map_sc
+
+
+MAGIC = b'A6SN'
+VERSION = 2
+
+# kinds
+SEPARATE_CHAINING = 0
+OPEN_ADDRESSING = 1
+
+# flags
+POWER_OF_TWO = 1
+HASHES = 2
+
+_HEADER = struct.Struct('<4sHBBQQB')
+_HASHED_LENGTHS = struct.Struct('<QII')
+_LENGTHS = struct.Struct('<II')
+_MASK64 = (1 << 64) - 1
+
+# hash functions whose value depends on a per-process key: their hashes are not stored
+_PROCESS_KEYED = ('siphash',)
+
+
+def _function_name(function: callable) -> str:
+    """
+    Return the HASH_FUNCTIONS name of function, or '' for a function that is not
+    registered, in which case read_snapshot() has to be given the function.
+    """
+    for name, registered in HASH_FUNCTIONS.items():
+        if registered is function:
+            return name
+    return ''
+
+
+def write_snapshot(hash_map, file, chunk_size: int = 1 << 16) -> int:
+    """
+    Write a snapshot of a separate chaining or open addressing HashMap to the binary
+    file object file. Entries are encoded into a buffer that is written out each time
+    it reaches chunk_size bytes, so memory stays bounded by one chunk plus one entry.
+    Keys must be strings and values must be picklable. Returns the bytes written.
+    """
+    if isinstance(hash_map, hash_map_sc.HashMap):
+        kind, entries = SEPARATE_CHAINING, hash_map._nodes()
+    elif isinstance(hash_map, hash_map_oa.HashMap):
+        kind, entries = OPEN_ADDRESSING, hash_map._entries()
+    else:
+        raise TypeError("write_snapshot() needs a separate chaining or open addressing HashMap")
+
+    name = _function_name(hash_map._hash_function)
+    flags = POWER_OF_TWO if hash_map._power_of_two else 0
+    if name and name not in _PROCESS_KEYED:
+        flags |= HASHES
+
+    buffer = bytearray(_HEADER.pack(MAGIC, VERSION, kind, flags, hash_map.get_size(),
+                                      hash_map.get_capacity(), len(name)))
+    buffer += name.encode('ascii')
+    written = 0
+
+    for entry in entries:
+        key = entry.key.encode('utf-8')
+        value = pickle.dumps(entry.value, pickle.HIGHEST_PROTOCOL)
+        if flags & HASHES:
+            buffer += _HASHED_LENGTHS.pack(entry.hash & _MASK64, len(key), len(value))
+        else:
+            buffer += _LENGTHS.pack(len(key), len(value))
+        buffer += key
+        buffer += value
+
+        if len(buffer) >= chunk_size:
+            file.write(buffer)
+            written += len(buffer)
+            buffer.clear()
+
+    file.write(buffer)
+    return written + len(buffer)
+
+
+def _read_exactly(file, size: int) -> bytes:
+    """
+    Read size bytes from file, raising ValueError if the snapshot ends early.
+    """
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError("snapshot is truncated")
+    return data
+
+
+def read_snapshot(file, function=None, **options):
+    """
+    Restore a HashMap from a snapshot read from the binary file object file. The map
+    is the kind the snapshot was taken from, with the same hash function (or
+    function, which is required when the snapshot's function was not registered)
+    and capacity mode. options are passed to the HashMap constructor. The table is
+    presized for every entry, so restoring never triggers a resize: a separate
+    chaining map is sized for the entry count, and an open addressing map gets the
+    capacity it was saved with and its entries are placed straight into their
+    buckets, with no key comparisons. Values are unpickled, which can run arbitrary
+    code, so only read snapshots from a trusted source.
+    """
+    magic, version, kind, flags, count, capacity, name_length = _HEADER.unpack(_read_exactly(file, _HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} HashMap snapshot")
+    name = _read_exactly(file, name_length).decode('ascii')
+
+    if function is None:
+        if not name:
+            raise ValueError("snapshot was taken with an unregistered hash function, pass function")
+        function = name
+    function = get_hash_function(function)
+    # stored hashes are only valid for the exact function that produced them
+    use_hashes = flags & HASHES and HASH_FUNCTIONS.get(name) is function
+    power_of_two = bool(flags & POWER_OF_TWO)
+
+    if kind == SEPARATE_CHAINING:
+        hash_map = hash_map_sc.HashMap(11, function, expected_size=count, power_of_two=power_of_two, **options)
+    elif kind == OPEN_ADDRESSING:
+        hash_map = hash_map_oa.HashMap(capacity, function, power_of_two=power_of_two, **options)
+        entries = []
+    else:
+        raise ValueError(f"unknown snapshot kind {kind}")
+
+    # each read takes one entry's key and value plus the lengths of the entry after it
+    lengths = _HASHED_LENGTHS if flags & HASHES else _LENGTHS
+    record = memoryview(_read_exactly(file, lengths.size if count else 0))
+    offset = 0
+    for remaining in range(count - 1, -1, -1):
+        if flags & HASHES:
+            hash, key_length, value_length = lengths.unpack_from(record, offset)
+        else:
+            key_length, value_length = lengths.unpack_from(record, offset)
+        size = key_length + value_length
+        record = memoryview(_read_exactly(file, size + (lengths.size if remaining else 0)))
+        offset = size
+        key = str(record[:key_length], 'utf-8')
+        value = pickle.loads(record[key_length:size])
+        if kind == OPEN_ADDRESSING:
+            entries.append(HashEntry(key, value, hash if use_hashes else hash_map._hash_key(key)))
+        elif use_hashes:
+            hash_map._put_hashed(key, value, hash)
+        else:
+            hash_map.put(key, value)
+
+    if kind == OPEN_ADDRESSING:
+        hash_map._scatter(entries)
+    return hash_map
+
+
+def save_snapshot(hash_map, path: str, chunk_size: int = 1 << 16) -> int:
+    """
+    Write a snapshot of hash_map to the file at path. Returns the bytes written.
+    """
+    with open(path, 'wb') as file:
+        return write_snapshot(hash_map, file, chunk_size)
+
+
+def load_snapshot(path: str, function=None, **options):
+    """
+    Restore a HashMap from the snapshot file at path.
+    """
+    with open(path, 'rb') as file:
+        return read_snapshot(file, function, **options)
+
+
+def snapshot_benchmark(hash_map, path: str) -> (dict, dict):
+    """
+    Save and restore hash_map with save_snapshot()/load_snapshot() and with pickle.
+    Returns ({'bytes', 'save_ms', 'load_ms'} for the snapshot, the same for pickle).
+    """
+    results = []
+    for save, load in ((lambda: save_snapshot(hash_map, path), lambda: load_snapshot(path)),
+                       (lambda: _pickle_save(hash_map, path), lambda: _pickle_load(path))):
+        start = time.perf_counter()
+        save()
+        saved = time.perf_counter()
+        restored = load()
+        loaded = time.perf_counter()
+        if restored.get_size() != hash_map.get_size():
+            raise RuntimeError(f"restored {restored.get_size()} entries, expected {hash_map.get_size()}")
+        results.append({'bytes': os.path.getsize(path), 'save_ms': (saved - start) * 1000,
+                        'load_ms': (loaded - saved) * 1000})
+    return results[0], results[1]
+
+
+def _pickle_save(hash_map, path: str) -> None:
+    """Pickle the whole map object to path."""
+    with open(path, 'wb') as file:
+        pickle.dump(hash_map, file, pickle.HIGHEST_PROTOCOL)
+
+
+def _pickle_load(path: str):
+    """Unpickle a map object from path."""
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nSnapshot - round trip")
+    print("---------------------")
+    for m in (hash_map_sc.HashMap(11, 'fnv1a', max_load_factor=1.0),
+              hash_map_oa.HashMap(11, 'murmur', power_of_two=True),
+              hash_map_oa.HashMap(11, 'siphash', robin_hood=True)):
+        for i in range(5000):
+            m.put('key' + str(i), (i, str(i)))
+        buffer = io.BytesIO()
+        write_snapshot(m, buffer, chunk_size=4096)
+        buffer.seek(0)
+        restored = read_snapshot(buffer)
+        print(type(restored).__module__, restored.get_size(), restored.get_capacity(),
+              dict(restored.items()) == dict(m.items()))
+
+    print("\nSnapshot - against pickle (50000 entries)")
+    print("-----------------------------------------")
+    print(f"{'map':>4} {'format':>8} {'KiB':>8} {'save ms':>9} {'load ms':>9}")
+    path = os.path.join(tempfile.mkdtemp(), 'map.a6sn')
+    for name, m in (('SC', hash_map_sc.HashMap(11, 'fnv1a', max_load_factor=1.0)),
+                    ('OA', hash_map_oa.HashMap(11, 'fnv1a'))):
+        for i in range(50000):
+            m.put('key' + str(i), i)
+        snapshot, pickled = snapshot_benchmark(m, path)
+        for format, result in (('snapshot', snapshot), ('pickle', pickled)):
+            print(f"{name:>4} {format:>8} {result['bytes'] / 1024:>8.0f} {result['save_ms']:>9.1f} "
+                  f"{result['load_ms']:>9.1f}")
+    os.remove(path)